@@ -21,11 +21,22 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
 import os
+import time
 from .theme import *
-from .utils import get_video_info, download_format, ensure_yt_dlp, ensure_dependencies
+from .utils import get_video_info, ensure_yt_dlp, ensure_dependencies, time_range_section, format_timestamp
+from .formats import select_formats, describe_selection
+from .jobs import make_prefs
+from .convert import CONVERT_MODES, conversion_path, PATH_COPY, PATH_DECODE, PATH_TRANSCODE
+from .journal import download_params, journaled_download, resume_unfinished, get_journal
+from . import subscriptions
 from .languages import STRINGS
+from .profiling import profiled
 
 class YutubApp(tk.Tk):
+    # Values behind the "Best Match" comboboxes (same order as the localized labels)
+    AUTO_TARGETS = [None, 2160, 1440, 1080, 720, 480, 360]
+    AUTO_CODECS = [None, ['av1', 'vp9'], ['h264']]
+
     def __init__(self, debug=False):
         super().__init__()
         
@@ -33,6 +44,10 @@ class YutubApp(tk.Tk):
         self.current_lang = "EN"
         self.title("Yutub - YouTube Downloader")
         self.auth_args = None
+        self.info_json = None
+        self.explored_url = None
+        self.formats = []
+        self.chapters = []
         
         # Immediate check for yt-dlp to skip splash if possible
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -87,7 +102,7 @@ class YutubApp(tk.Tk):
         if hasattr(self, 'splash'):
             self.splash.destroy()
         
-        self.geometry("800x650")
+        self.geometry("800x720")
         self.configure(bg=BG_DARK)
         
         self.style = ttk.Style()
@@ -96,6 +111,30 @@ class YutubApp(tk.Tk):
         
         self.setup_ui()
         self.deiconify() # Show main window
+        self.resume_interrupted()
+
+    def resume_interrupted(self):
+        """Restart downloads that were cut off by a crash or reboot (see journal.py)."""
+        def task():
+            pending = get_journal().interrupted()
+            if not pending:
+                return
+            self.after(0, lambda: self.status_label.config(text=self.get_text("status_resuming").format(count=len(pending)), foreground=ACCENT))
+
+            def progress_update(p):
+                self.after(0, lambda: self.status_label.config(text=f"{self.get_text('status_resuming_dl')}{p}"))
+
+            results = resume_unfinished(progress_update, debug=self.debug)
+            failed = [msg for _params, success, msg in results if not success]
+            self.after(0, lambda: self.on_resume_complete(len(results), failed))
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_resume_complete(self, count, failed):
+        self.status_label.config(text=self.get_text("status_resumed").format(count=count - len(failed), failed=len(failed)),
+                                 foreground="red" if failed else SUCCESS)
+        if failed:
+            self.show_error(self.get_text("err_title"), "\n\n".join(failed))
 
     def configure_styles(self):
         self.style.configure("TFrame", background=BG_DARK)
@@ -121,9 +160,6 @@ class YutubApp(tk.Tk):
         self.style.configure("Disabled.TButton", background=TEXT_DIM, foreground=TEXT_WHITE)
         self.style.map("TButton", background=[("disabled", TEXT_DIM)], foreground=[("disabled", TEXT_WHITE)])
 
-        # Treeview Disabled
-        self.style.configure("Disabled.Treeview", background="#1a1a1a", foreground=TEXT_DIM, fieldbackground="#1a1a1a")
-
         self.style.configure("TCombobox", fieldbackground=BG_CARD, background=ACCENT, foreground=TEXT_MAIN, arrowcolor=TEXT_MAIN)
         self.style.map("TCombobox", 
             fieldbackground=[("readonly", BG_CARD), ("disabled", TEXT_DIM)], 
@@ -172,12 +208,18 @@ class YutubApp(tk.Tk):
         self.explore_btn.config(text=self.get_text("explore"))
         self.lbl_video.config(text=self.get_text("video_header"))
         self.lbl_audio.config(text=self.get_text("audio_header"))
-        self.lbl_convert.config(text=self.get_text("convert_label"))
+        self.update_conversion_path()
+        self.lbl_auto.config(text=self.get_text("auto_label"))
+        self.lbl_clip.config(text=self.get_text("clip_label"))
+        self.lbl_clip_range.config(text=self.get_text("clip_range"))
+        self.accurate_check.config(text=self.get_text("clip_accurate"))
+        self.set_chapter_options()
         self.lbl_footer.config(text=self.get_text("footer"))
         
         # Buttons
         self.get_video_btn.config(text=self.get_text("get_video"))
         self.get_audio_btn.config(text=self.get_text("get_audio"))
+        self.get_best_btn.config(text=self.get_text("get_best"))
         
         # Treeviews columns
         self.video_tree.heading("format", text=self.get_text("col_format"))
@@ -190,6 +232,7 @@ class YutubApp(tk.Tk):
 
         # Lang button
         self.lang_btn.config(text="ES" if self.current_lang == "EN" else "EN")
+        self.subs_btn.config(text=self.get_text("subs_button"))
 
         # Update combo values mapping
         # We need to preserve selection logic if possible or reset it
@@ -199,6 +242,11 @@ class YutubApp(tk.Tk):
              self.audio_conv_combo.current(current_idx)
         else:
              self.audio_conv_combo.current(0)
+
+        for combo, key in ((self.auto_target_combo, "auto_targets"), (self.auto_codec_combo, "auto_codecs")):
+            current_idx = combo.current()
+            combo['values'] = self.get_text(key)
+            combo.current(max(current_idx, 0))
              
     def setup_ui(self):
         # 1. Header Bar
@@ -210,8 +258,8 @@ class YutubApp(tk.Tk):
         header_frame.columnconfigure(1, weight=1)
         header_frame.columnconfigure(2, weight=1)
         
-        # Empty left column filler
-        ttk.Frame(header_frame).grid(row=0, column=0, sticky="w")
+        self.subs_btn = ttk.Button(header_frame, text=self.get_text("subs_button"), style="Lang.TButton", width=14, command=self.open_subscriptions)
+        self.subs_btn.grid(row=0, column=0, sticky="w", padx=(20, 0))
         
         self.lbl_title = ttk.Label(header_frame, text=self.get_text("header_title"), style="Title.TLabel", anchor="center")
         self.lbl_title.grid(row=0, column=1)
@@ -276,7 +324,7 @@ class YutubApp(tk.Tk):
         v_scroll = ttk.Scrollbar(v_tree_frame, orient="vertical")
         v_scroll.pack(side="right", fill="y")
         
-        self.video_tree = ttk.Treeview(v_tree_frame, columns=("format", "res", "size"), show="headings", selectmode="browse", yscrollcommand=v_scroll.set)
+        self.video_tree = ttk.Treeview(v_tree_frame, columns=("format", "res", "size"), show="headings", selectmode="extended", yscrollcommand=v_scroll.set)
         self.video_tree.heading("format", text=self.get_text("col_format"))
         self.video_tree.heading("res", text=self.get_text("col_res"))
         self.video_tree.heading("size", text=self.get_text("col_size"))
@@ -294,7 +342,7 @@ class YutubApp(tk.Tk):
         a_scroll = ttk.Scrollbar(a_tree_frame, orient="vertical")
         a_scroll.pack(side="right", fill="y")
 
-        self.audio_tree = ttk.Treeview(a_tree_frame, columns=("ext", "quality", "size"), show="headings", selectmode="browse", yscrollcommand=a_scroll.set)
+        self.audio_tree = ttk.Treeview(a_tree_frame, columns=("ext", "quality", "size"), show="headings", selectmode="extended", yscrollcommand=a_scroll.set)
         self.audio_tree.heading("ext", text=self.get_text("col_format"))
         self.audio_tree.heading("quality", text=self.get_text("col_quality"))
         self.audio_tree.heading("size", text=self.get_text("col_size"))
@@ -331,6 +379,50 @@ class YutubApp(tk.Tk):
         self.audio_conv_combo['values'] = self.get_text("convert_opts")
         self.audio_conv_combo.current(0)
         self.audio_conv_combo.pack(pady=(2, 0))
+        self.audio_conv_combo.bind("<<ComboboxSelected>>", self.update_conversion_path)
+
+        # --- AUTO SELECTION (Row 3) ---
+        # Picks the smallest download (muxed or video+audio merge) meeting the target
+        auto_frame = ttk.Frame(formats_frame)
+        auto_frame.grid(row=3, column=0, columnspan=3, sticky="ew")
+
+        self.lbl_auto = ttk.Label(auto_frame, text=self.get_text("auto_label"), style="Header.TLabel")
+        self.lbl_auto.pack(side="left", padx=(0, 10))
+
+        self.auto_target_combo = ttk.Combobox(auto_frame, state="readonly", width=10)
+        self.auto_target_combo['values'] = self.get_text("auto_targets")
+        self.auto_target_combo.current(3)
+        self.auto_target_combo.pack(side="left", padx=(0, 10))
+
+        self.auto_codec_combo = ttk.Combobox(auto_frame, state="readonly", width=16)
+        self.auto_codec_combo['values'] = self.get_text("auto_codecs")
+        self.auto_codec_combo.current(1)
+        self.auto_codec_combo.pack(side="left", padx=(0, 10))
+
+        self.get_best_btn = ttk.Button(auto_frame, text=self.get_text("get_best"), style="Download.TButton", command=self.handle_get_best, state="disabled")
+        self.get_best_btn.pack(side="left", fill="x", expand=True)
+
+        # --- CLIP (Row 4) ---
+        # Download only a chapter and/or a time range instead of the whole stream
+        clip_frame = ttk.Frame(formats_frame)
+        clip_frame.grid(row=4, column=0, columnspan=3, sticky="ew", pady=(10, 0))
+
+        self.lbl_clip = ttk.Label(clip_frame, text=self.get_text("clip_label"), style="Header.TLabel")
+        self.lbl_clip.pack(side="left", padx=(0, 10))
+
+        self.clip_chapter_combo = ttk.Combobox(clip_frame, state="disabled", width=30)
+        self.clip_chapter_combo.pack(side="left", padx=(0, 10))
+        self.set_chapter_options()
+
+        self.lbl_clip_range = ttk.Label(clip_frame, text=self.get_text("clip_range"), style="Footer.TLabel")
+        self.lbl_clip_range.pack(side="left", padx=(0, 5))
+
+        self.clip_range_var = tk.StringVar()
+        tk.Entry(clip_frame, textvariable=self.clip_range_var, width=14, bg=BG_CARD, fg=TEXT_WHITE, insertbackground=TEXT_WHITE, font=FONT_NORMAL, border=0, highlightthickness=1, highlightbackground=INPUT_BORDER).pack(side="left", padx=(0, 10), ipady=4)
+
+        self.accurate_cuts_var = tk.BooleanVar(value=False)
+        self.accurate_check = tk.Checkbutton(clip_frame, text=self.get_text("clip_accurate"), variable=self.accurate_cuts_var, bg=BG_DARK, fg=TEXT_MAIN, selectcolor=BG_CARD, activebackground=BG_DARK, activeforeground=TEXT_MAIN, font=FONT_NORMAL, highlightthickness=0)
+        self.accurate_check.pack(side="left")
         
         # 3. Bottom Bar
         footer_frame = ttk.Frame(self, padding=10)
@@ -357,7 +449,13 @@ class YutubApp(tk.Tk):
         # Reset UI
         self.get_video_btn.config(state="disabled")
         self.get_audio_btn.config(state="disabled")
+        self.get_best_btn.config(state="disabled")
         self.audio_conv_combo.config(state="disabled")
+        self.formats = []
+        self.chapters = []
+        self.info_json = None
+        self.explored_url = url
+        self.set_chapter_options()
         
         for tree in (self.video_tree, self.audio_tree):
             for item in tree.get_children():
@@ -369,14 +467,21 @@ class YutubApp(tk.Tk):
 
         threading.Thread(target=task, daemon=True).start()
 
+    @profiled("ui.update_ui_with_data")
     def update_ui_with_data(self, data):
         self.validate_input() # Re-enable check based on current text (in case user cleared it while loading)
         if 'error' in data:
-            self.status_label.config(text=self.get_text("explore_failed"), foreground="red")
+            cause = self.get_text(f"cause_{data.get('error_type', 'unknown')}")
+            self.status_label.config(text=f"{self.get_text('explore_failed')}: {cause}", foreground="red")
             self.show_error(self.get_text("err_title"), data['error'])
             return
 
         self.auth_args = data.get('auth_args')
+        self.info_json = data.get('info_json')
+        self.formats = data.get('formats', [])
+        self.get_best_btn.config(state="normal" if self.formats else "disabled")
+        self.chapters = data.get('chapters', [])
+        self.set_chapter_options()
         self.status_label.config(text=data['title'], foreground=SUCCESS)
         
         # Clear trees
@@ -386,35 +491,46 @@ class YutubApp(tk.Tk):
                 
         # Insert Video (Format, Resolution, Size)
         for f in data['video']: 
-            self.video_tree.insert("", "end", iid=f['format_id'], values=(f['ext'], f['res'], f['size']))
+            self.video_tree.insert("", "end", iid=f['selector'], values=(f['ext'], f['res'], f['size']))
             
         # Insert Audio (Ext, Quality, Size)
         for f in data['audio']: 
-            self.audio_tree.insert("", "end", iid=f['format_id'], values=(f['ext'], f['quality'], f['size']))
+            self.audio_tree.insert("", "end", iid=f['selector'], values=(f['ext'], f['quality'], f['size']))
 
+    @profiled("ui.on_video_select")
     def on_video_select(self, event):
-        """When selecting video, enable video btn, disable audio side."""
-        if self.video_tree.selection():
-            self.audio_tree.selection_remove(self.audio_tree.selection())
-            # Update states
-            self.get_video_btn.config(state="normal")
-            self.get_audio_btn.config(state="disabled")
-            self.audio_conv_combo.config(state="disabled")
-            # Update visual themes
-            self.video_tree.config(style="Treeview")
-            self.audio_tree.config(style="Disabled.Treeview")
+        """Video button follows the video selection (several rows may be selected)."""
+        self.get_video_btn.config(state="normal" if self.video_tree.selection() else "disabled")
 
+    @profiled("ui.on_audio_select")
     def on_audio_select(self, event):
-        """When selecting audio, enable audio btn, disable video side."""
+        """Audio button and conversion follow the audio selection."""
         if self.audio_tree.selection():
-            self.video_tree.selection_remove(self.video_tree.selection())
-            # Update states
             self.get_audio_btn.config(state="normal")
             self.audio_conv_combo.config(state="readonly")
-            self.get_video_btn.config(state="disabled")
-            # Update visual themes
-            self.audio_tree.config(style="Treeview")
-            self.video_tree.config(style="Disabled.Treeview")
+        else:
+            self.get_audio_btn.config(state="disabled")
+            self.audio_conv_combo.config(state="disabled")
+        self.update_conversion_path()
+
+    def conversion_mode(self):
+        """Canonical conversion mode behind the localized combobox, None for the original format."""
+        idx = self.audio_conv_combo.current()
+        modes = [None] + list(CONVERT_MODES.values())
+        return modes[idx] if 0 <= idx < len(modes) else None
+
+    def update_conversion_path(self, event=None):
+        """Show next to the conversion whether it copies the stream or re-encodes it."""
+        text = self.get_text("convert_label")
+        conv_mode = self.conversion_mode()
+        selection = self.audio_tree.selection()
+        if conv_mode and selection:
+            codecs = {f['format_id']: f['acodec'] for f in self.formats}
+            paths = {conversion_path(conv_mode, codecs.get(sel)) for sel in selection}
+            # The costliest path among the selected sources
+            path = next(p for p in (PATH_TRANSCODE, PATH_DECODE, PATH_COPY) if p in paths)
+            text += f": {self.get_text(f'conv_path_{path}')}"
+        self.lbl_convert.config(text=text)
 
     def show_error(self, title, message):
         print(f"[{title}] {message}")
@@ -435,7 +551,8 @@ class YutubApp(tk.Tk):
             messagebox.showwarning(self.get_text("w_select"), self.get_text("m_select_video"))
             return
         
-        format_id = selection[0]
+        # Selected audio rows ride along in the same yt-dlp run (one extraction for all)
+        format_id = ",".join(selection + self.audio_tree.selection())
         self.start_download(format_id)
 
     def handle_get_audio(self):
@@ -444,24 +561,63 @@ class YutubApp(tk.Tk):
             messagebox.showwarning(self.get_text("w_select"), self.get_text("m_select_audio"))
             return
         
-        format_id = selection[0]
-        # Map localized selection back to EN logic if needed, or simple index logic
-        # Current logic passes the string directly. If we translate the dropdown, we must handle the mapping.
-        # "Convert to MP3" -> logic expects "Convert to MP3".
-        # We need to map the display string back to the logic string OR update utils to accept keywords.
-        # Easiest: get index and map to canonical EN list.
-        idx = self.audio_conv_combo.current()
-        en_opts = ["Original Format", "Convert to MP3", "Convert to WAV"]
-        conv_mode = en_opts[idx] if idx >= 0 else None
-        
-        self.start_download(format_id, conv_mode)
+        format_id = ",".join(selection)
+        # The dropdown is localized: map its index back to the canonical mode
+        self.start_download(format_id, self.conversion_mode())
+
+    def auto_preferences(self):
+        """(height, prefer_codecs) chosen in the Best Match row."""
+        height = self.AUTO_TARGETS[max(self.auto_target_combo.current(), 0)]
+        prefer = self.AUTO_CODECS[max(self.auto_codec_combo.current(), 0)]
+        return height, prefer
+
+    def handle_get_best(self):
+        height, prefer = self.auto_preferences()
+
+        candidate = select_formats(self.formats, height=height, prefer_codecs=prefer)
+        if candidate is None:
+            # Target above what the video offers: take the best available instead
+            candidate = select_formats(self.formats, prefer_codecs=prefer)
+        if candidate is None:
+            messagebox.showwarning(self.get_text("w_select"), self.get_text("m_no_match"))
+            return
+
+        if self.debug: print(f"Auto selected: {describe_selection(candidate)}")
+        self.start_download(candidate['selector'])
+
+    def set_chapter_options(self):
+        """Fill the chapter combobox from the explored metadata."""
+        current_idx = self.clip_chapter_combo.current()
+        values = [self.get_text("clip_whole")]
+        values += [f"{format_timestamp(c['start'])}  {c['title']}" for c in self.chapters]
+        self.clip_chapter_combo['values'] = values
+        self.clip_chapter_combo.current(current_idx if 0 <= current_idx < len(values) else 0)
+        self.clip_chapter_combo.config(state="readonly" if self.chapters else "disabled")
+
+    def clip_sections(self):
+        """--download-sections values for the clip row ([] = whole video). Raises ValueError on a bad range."""
+        sections = []
+        idx = self.clip_chapter_combo.current()
+        if idx > 0:
+            chapter = self.chapters[idx - 1]
+            end = f"{chapter['end']:g}" if chapter['end'] else "inf"
+            sections.append(f"*{chapter['start']:g}-{end}")
+        time_range = self.clip_range_var.get().strip()
+        if time_range:
+            sections.append(time_range_section(time_range))
+        return sections
 
     def start_download(self, format_id, conv_mode=None):
-        # Create downloads folder
-        os.makedirs("downloads", exist_ok=True)
-        
+        try:
+            sections = self.clip_sections()
+        except ValueError:
+            messagebox.showwarning(self.get_text("w_input"), self.get_text("m_clip_range"))
+            return
+        accurate_cuts = self.accurate_cuts_var.get()
+
         self.get_video_btn.config(state="disabled")
         self.get_audio_btn.config(state="disabled")
+        self.get_best_btn.config(state="disabled")
         self.audio_conv_combo.config(state="disabled")
         self.status_label.config(text=self.get_text("status_start"), foreground=ACCENT)
 
@@ -470,14 +626,25 @@ class YutubApp(tk.Tk):
                  txt = self.get_text("status_converting")
             else:
                  txt = f"{self.get_text('status_downloading')}{p}"
-            self.after(0, lambda: self.status_label.config(text=txt))
+            self.after(0, lambda: self.show_status(txt))
+
+        url = self.url_var.get()
+        # The explored metadata only applies if the URL wasn't edited since
+        info_json = self.info_json if url.strip() == self.explored_url else None
 
         def task():
-            success, msg = download_format(self.url_var.get(), format_id, progress_update, conv_mode, self.auth_args, debug=self.debug)
+            params = download_params(url, format_id, conv_mode, self.auth_args, sections=sections, accurate_cuts=accurate_cuts,
+                                     info_json=info_json)
+            success, msg = journaled_download(params, progress_update, debug=self.debug)
             self.after(0, lambda: self.on_download_complete(success, msg))
             
         threading.Thread(target=task, daemon=True).start()
 
+    @profiled("ui.show_status")
+    def show_status(self, txt):
+        self.status_label.config(text=txt)
+
+    @profiled("ui.on_download_complete")
     def on_download_complete(self, success, msg=""):
         self.status_label.config(text=self.get_text("status_done") if success else self.get_text("status_fail"), 
                                  foreground=SUCCESS if success else "red")
@@ -488,8 +655,134 @@ class YutubApp(tk.Tk):
         if self.audio_tree.selection():
             self.get_audio_btn.config(state="normal")
             self.audio_conv_combo.config(state="readonly")
+        if self.formats:
+            self.get_best_btn.config(state="normal")
 
         if success:
-            messagebox.showinfo(self.get_text("s_success"), self.get_text("m_success"))
+            messagebox.showinfo(self.get_text("s_success"), self.get_text("m_success").format(path=msg))
         else:
             self.show_error(self.get_text("err_title"), msg)
+
+    def open_subscriptions(self):
+        """Window to manage channel/playlist subscriptions and sync them."""
+        if getattr(self, 'subs_win', None) and self.subs_win.winfo_exists():
+            self.subs_win.lift()
+            return
+
+        self.subs_win = tk.Toplevel(self)
+        self.subs_win.title(self.get_text("subs_title"))
+        self.subs_win.geometry("700x420")
+        self.subs_win.configure(bg=BG_DARK)
+
+        frame = ttk.Frame(self.subs_win, padding=15)
+        frame.pack(fill="both", expand=True)
+
+        add_row = ttk.Frame(frame)
+        add_row.pack(fill="x", pady=(0, 10))
+        input_container = tk.Frame(add_row, bg=BG_CARD, highlightthickness=2, highlightbackground=INPUT_BORDER, highlightcolor=INPUT_BORDER)
+        input_container.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.subs_url_var = tk.StringVar()
+        tk.Entry(input_container, textvariable=self.subs_url_var, bg=BG_CARD, fg=TEXT_WHITE, insertbackground=TEXT_WHITE, font=FONT_NORMAL, border=0, highlightthickness=0).pack(fill="x", expand=True, padx=10, ipady=6)
+        self.subs_add_btn = ttk.Button(add_row, text=self.get_text("subs_add"), command=self.handle_add_subscription)
+        self.subs_add_btn.pack(side="right")
+
+        self.subs_tree = ttk.Treeview(frame, columns=("name", "pending", "last_sync"), show="headings", selectmode="browse")
+        self.subs_tree.heading("name", text=self.get_text("col_source"))
+        self.subs_tree.heading("pending", text=self.get_text("col_pending"))
+        self.subs_tree.heading("last_sync", text=self.get_text("col_last_sync"))
+        self.subs_tree.column("name", width=380)
+        self.subs_tree.column("pending", width=80)
+        self.subs_tree.column("last_sync", width=140)
+        self.subs_tree.pack(fill="both", expand=True)
+
+        btn_row = ttk.Frame(frame)
+        btn_row.pack(fill="x", pady=(10, 0))
+        self.subs_sync_btn = ttk.Button(btn_row, text=self.get_text("subs_sync"), style="Download.TButton", command=self.handle_sync_subscriptions)
+        self.subs_sync_btn.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        ttk.Button(btn_row, text=self.get_text("subs_remove"), command=self.handle_remove_subscription).pack(side="right")
+
+        self.subs_status = ttk.Label(frame, text="", style="Footer.TLabel", anchor="center")
+        self.subs_status.pack(fill="x", pady=(10, 0))
+
+        self.refresh_subscriptions()
+
+    @profiled("ui.refresh_subscriptions")
+    def refresh_subscriptions(self):
+        if not (getattr(self, 'subs_win', None) and self.subs_win.winfo_exists()):
+            return
+        for item in self.subs_tree.get_children():
+            self.subs_tree.delete(item)
+        for sub in subscriptions.load_subscriptions():
+            last = time.strftime("%Y-%m-%d %H:%M", time.localtime(sub['last_sync']))
+            self.subs_tree.insert("", "end", iid=sub['key'], values=(sub['name'], len(sub['pending']), last))
+
+    def set_subs_status(self, txt):
+        if getattr(self, 'subs_win', None) and self.subs_win.winfo_exists():
+            self.subs_status.config(text=txt)
+
+    def handle_add_subscription(self):
+        url = self.subs_url_var.get().strip()
+        if "youtube.com" not in url:
+            messagebox.showwarning(self.get_text("w_input"), self.get_text("m_input"), parent=self.subs_win)
+            return
+
+        # New subscriptions download with the current "Best Match" preferences
+        height, prefer = self.auto_preferences()
+        prefs = make_prefs(height=height, prefer=prefer or [])
+        self.subs_add_btn.config(state="disabled")
+        self.set_subs_status(self.get_text("subs_adding"))
+
+        def task():
+            try:
+                subscriptions.add_subscription(url, prefs, debug=self.debug)
+                error = None
+            except Exception as e:
+                error = str(e)
+            self.after(0, lambda: self.on_subscription_added(error))
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_subscription_added(self, error):
+        if not (getattr(self, 'subs_win', None) and self.subs_win.winfo_exists()):
+            return
+        self.subs_add_btn.config(state="normal")
+        if error:
+            self.set_subs_status("")
+            self.show_error(self.get_text("err_title"), error)
+            return
+        self.subs_url_var.set("")
+        self.set_subs_status("")
+        self.refresh_subscriptions()
+
+    def handle_remove_subscription(self):
+        for key in self.subs_tree.selection():
+            subscriptions.remove_subscription(key)
+        self.refresh_subscriptions()
+
+    def handle_sync_subscriptions(self):
+        self.subs_sync_btn.config(state="disabled")
+
+        def progress_update(txt):
+            self.after(0, lambda: self.set_subs_status(txt))
+
+        def task():
+            downloaded = failed = 0
+            errors = []
+            for sub in subscriptions.load_subscriptions():
+                try:
+                    d, f = subscriptions.sync_subscription(sub, progress_update, debug=self.debug)
+                    downloaded += d
+                    failed += f
+                except Exception as e:
+                    errors.append(f"{sub['name']}: {e}")
+            self.after(0, lambda: self.on_sync_complete(downloaded, failed, errors))
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_sync_complete(self, downloaded, failed, errors):
+        if getattr(self, 'subs_win', None) and self.subs_win.winfo_exists():
+            self.subs_sync_btn.config(state="normal")
+        self.set_subs_status(self.get_text("subs_done").format(downloaded=downloaded, failed=failed))
+        self.refresh_subscriptions()
+        if errors:
+            self.show_error(self.get_text("err_title"), "\n".join(errors))
@@ -0,0 +1,392 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Headless command line interface (no Tk required)
+
+import argparse
+import json
+import socket
+import sys
+import time
+from .utils import get_video_info, time_range_section, format_timestamp, stream_format
+from .formats import parse_size, parse_height, parse_kbps, format_size
+from .jobs import CONVERT_MODES, make_prefs, select_for_prefs
+from .convert import conversion_path
+from . import subscriptions, profiling
+from .config import load_config
+from .workqueue import JobQueue, run_worker
+from .journal import download_params, journaled_download, resume_unfinished
+from .store import open_store
+
+def print_progress(p):
+    sys.stderr.write(f"\r{p}      ")
+    sys.stderr.flush()
+
+def report_error(info):
+    """Print a classified explore error and return the exit status."""
+    print(f"[{info.get('error_type', 'unknown')}] {info['error']}", file=sys.stderr)
+    return 1
+
+def add_selection_args(parser):
+    """Format selection options shared by commands that download."""
+    parser.add_argument("-f", "--format", help="explicit yt-dlp format selector (skips automatic selection)")
+    parser.add_argument("--height", type=parse_height, help="target resolution, e.g. 1080p")
+    parser.add_argument("--min-abr", type=parse_kbps, help="minimum audio bitrate, e.g. 128k")
+    parser.add_argument("--prefer", default="", help="comma separated preferred codecs, e.g. vp9,av1")
+    parser.add_argument("--max-size", type=parse_size, help="byte budget, e.g. 500M")
+    parser.add_argument("--max-kbps", type=parse_kbps, help="total bitrate budget in kbps")
+    parser.add_argument("--audio-only", action="store_true", help="select among audio only formats")
+    parser.add_argument("--convert", choices=sorted(CONVERT_MODES), help="convert audio after download (stream copy when the codec allows it)")
+
+def add_clip_args(parser):
+    """Partial download options."""
+    parser.add_argument("--section", action="append", type=time_range_section, default=[],
+                        help="download only a time range, e.g. 1:00-2:30 (repeatable)")
+    parser.add_argument("--chapter", action="append", default=[],
+                        help="download only chapters whose title matches this regex (repeatable)")
+    parser.add_argument("--accurate-cuts", action="store_true",
+                        help="re-encode at the cut points instead of cutting on keyframes")
+
+def add_output_args(parser):
+    """Output location options (defaults come from config.json)."""
+    parser.add_argument("-o", "--output-dir", help="final library folder")
+    parser.add_argument("--scratch-dir", help="folder for in-progress files (fast local disk)")
+    parser.add_argument("--template", help="yt-dlp output template, e.g. '%%(uploader)s/%%(title)s.%%(ext)s'")
+
+def prefs_from_args(args):
+    """Format preferences from the options added by add_selection_args."""
+    return make_prefs(format=args.format, height=args.height, min_abr=args.min_abr,
+                      prefer=[c for c in args.prefer.split(",") if c], max_size=args.max_size,
+                      max_kbps=args.max_kbps, audio_only=args.audio_only, convert=args.convert,
+                      sections=getattr(args, 'section', []) + getattr(args, 'chapter', []),
+                      accurate_cuts=getattr(args, 'accurate_cuts', False))
+
+def cmd_explore(args):
+    info = get_video_info(args.url, debug=args.debug)
+    if 'error' in info:
+        return report_error(info)
+    if args.json:
+        print(json.dumps({k: v for k, v in info.items() if k not in ('auth_args', 'info_json')}, indent=2))
+        return 0
+    print(info['title'])
+    for f in info['video']:
+        print(f"  video {f['selector']:<16} {f['ext']:<5} {f['res']:<28} {f['size']}")
+    for f in info['audio']:
+        print(f"  audio {f['selector']:<16} {f['ext']:<5} {f['quality']:<28} {f['size']}")
+    for c in info['chapters']:
+        end = format_timestamp(c['end']) if c['end'] else ""
+        print(f"  chapter {format_timestamp(c['start'])}-{end}  {c['title']}")
+    return 0
+
+def open_sink(target):
+    """
+    Binary file object for a stream target: '-' (stdout), 'tcp:host:port',
+    'unix:/path/to/socket' or a file / named pipe path. Returns (sink, closer).
+    """
+    if target == "-":
+        return sys.stdout.buffer, None
+    if target.startswith("tcp:"):
+        host, _sep, port = target[len("tcp:"):].rpartition(":")
+        sock = socket.create_connection((host, int(port)))
+    elif target.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target[len("unix:"):])
+    else:
+        # Opening a named pipe waits here until a reader shows up
+        fh = open(target, "wb")
+        return fh, fh
+    return sock.makefile("wb"), sock
+
+def cmd_stream(args, info, prefs):
+    if prefs['convert'] or prefs['sections']:
+        print("Streaming can't convert or cut: the format is sent as is.", file=sys.stderr)
+        return 2
+    selector, summary = select_for_prefs(info, prefs, single_file=True)
+    if selector is None:
+        print("No single file format matches the requested target.", file=sys.stderr)
+        return 1
+    print(f"Streaming: {summary}", file=sys.stderr)
+    try:
+        sink, closer = open_sink(args.stream_to)
+    except (OSError, ValueError) as e:
+        print(f"Cannot open {args.stream_to}: {e}", file=sys.stderr)
+        return 1
+    try:
+        success, msg = stream_format(args.url, selector, sink, print_progress, info.get('auth_args'),
+                                     debug=args.debug, info_json=info.get('info_json'))
+    finally:
+        if closer:
+            sink.close()
+            closer.close()
+    sys.stderr.write("\n")
+    # stdout may be the stream itself
+    print(msg, file=sys.stderr)
+    return 0 if success else 1
+
+def cmd_download(args):
+    info = get_video_info(args.url, debug=args.debug)
+    if 'error' in info:
+        return report_error(info)
+
+    prefs = prefs_from_args(args)
+    if args.stream_to:
+        return cmd_stream(args, info, prefs)
+    selector, summary = select_for_prefs(info, prefs)
+    if selector is None:
+        print("No format matches the requested target.", file=sys.stderr)
+        return 1
+    print(f"Selected: {summary}", file=sys.stderr)
+    source = next((f for f in info['formats'] if f['format_id'] == selector), None)
+    if args.convert and source:
+        print(f"Conversion to {args.convert}: {conversion_path(args.convert, source['acodec'])}", file=sys.stderr)
+
+    params = download_params(args.url, selector, CONVERT_MODES.get(args.convert), info.get('auth_args'),
+                             output_dir=args.output_dir, scratch_dir=args.scratch_dir, template=args.template,
+                             sections=prefs['sections'], accurate_cuts=prefs['accurate_cuts'], info_json=info.get('info_json'))
+    success, msg = journaled_download(params, print_progress, debug=args.debug)
+    sys.stderr.write("\n")
+    print(msg, file=sys.stdout if success else sys.stderr)
+    return 0 if success else 1
+
+def cmd_subs_add(args):
+    try:
+        sub = subscriptions.add_subscription(args.url, prefs_from_args(args), name=args.name,
+                                             backfill=args.backfill, debug=args.debug)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Subscribed {sub['key']}: {sub['name']} ({len(sub['pending'])} queued)")
+    return 0
+
+def cmd_subs_list(args):
+    for sub in subscriptions.load_subscriptions():
+        last = time.strftime("%Y-%m-%d %H:%M", time.localtime(sub['last_sync']))
+        print(f"{sub['key']}  {sub['name']}  pending={len(sub['pending'])} failed={len(sub['failed'])} last_sync={last}")
+    return 0
+
+def cmd_subs_remove(args):
+    subscriptions.remove_subscription(args.key)
+    return 0
+
+def open_queue(args):
+    return JobQueue(args.db or load_config(debug=args.debug)['queue_db'])
+
+def cmd_queue_add(args):
+    queue = open_queue(args)
+    for url in args.urls:
+        job_id = queue.enqueue(url, prefs_from_args(args), max_attempts=args.max_attempts)
+        print(f"queued {job_id}: {url}" if job_id else f"already queued: {url}")
+    return 0
+
+def cmd_queue_list(args):
+    queue = open_queue(args)
+    for job in queue.jobs(args.status):
+        if job['status'] == "running":
+            detail = job['progress'] or ""
+        else:
+            # Last line of the result: output path or error summary
+            detail = ((job['result'] or "").strip().splitlines() or [""])[-1]
+        print(f"{job['id']:>5}  {job['status']:<8} {job['attempts']}/{job['max_attempts']}  {job['worker'] or '-':<24} {job['url']}  {detail}")
+    print(", ".join(f"{k}={v}" for k, v in sorted(queue.counts().items())) or "queue is empty")
+    return 0
+
+def cmd_queue_retry(args):
+    print(f"{open_queue(args).requeue_failed()} failed jobs queued again")
+    return 0
+
+def cmd_worker(args):
+    db_path = args.db or load_config(debug=args.debug)['queue_db']
+    try:
+        processed = run_worker(db_path, lease_seconds=args.lease, poll_interval=args.poll, once=args.once,
+                               debug=args.debug, output_dir=args.output_dir, scratch_dir=args.scratch_dir,
+                               template=args.template)
+    except KeyboardInterrupt:
+        # The lease of an interrupted job expires and another worker picks it up
+        return 130
+    print(f"{processed} jobs processed", file=sys.stderr)
+    return 0
+
+def cmd_sync(args):
+    status = 0
+    queue = open_queue(args) if args.enqueue else None
+    for sub in subscriptions.load_subscriptions():
+        if args.keys and sub['key'] not in args.keys:
+            continue
+        try:
+            downloaded, failed = subscriptions.sync_subscription(
+                sub, print_progress, debug=args.debug, download=not (args.list_only or args.enqueue),
+                output_dir=args.output_dir, scratch_dir=args.scratch_dir, template=args.template)
+        except RuntimeError as e:
+            print(f"\n{e}", file=sys.stderr)
+            status = 1
+            continue
+        sys.stderr.write("\n")
+        if queue:
+            # Hand the new entries to the workers instead of downloading here
+            for entry in list(sub['pending']):
+                queue.enqueue(entry['url'], sub['prefs'])
+                sub['pending'].remove(entry)
+                subscriptions.save_subscription(sub)
+        print(f"{sub['name']}: {downloaded} downloaded, {failed} failed, {len(sub['pending'])} pending")
+        if failed:
+            status = 1
+    return status
+
+def open_managed_store(args):
+    config = load_config(debug=args.debug)
+    store = open_store(args.dir or config['output_dir'], config, background=False)
+    if store is None:
+        print("The output folder is not managed: set 'store_quota' in config.json", file=sys.stderr)
+    return store
+
+def cmd_store_status(args):
+    store = open_managed_store(args)
+    if store is None:
+        return 1
+    status = store.status()
+    print(f"{store.root}: {status['files']} files, {format_size(status['used'])} of {format_size(status['quota'])} "
+          f"({format_size(status['pinned'])} pinned, {format_size(status['reserved'])} reserved), policy {store.policy}")
+    if args.list:
+        for item in store.items():
+            last = time.strftime("%Y-%m-%d %H:%M", time.localtime(item['last_access']))
+            print(f"{'pinned' if item['pinned'] else last:>16}  {format_size(item['size']):>10}  {item['path']}")
+    return 0
+
+def cmd_store_pin(args):
+    store = open_managed_store(args)
+    if store is None:
+        return 1
+    status = 0
+    for path in args.paths:
+        if not store.pin(path, pinned=args.store_command == "pin"):
+            print(f"not in the store: {path}", file=sys.stderr)
+            status = 1
+    return status
+
+def cmd_store_evict(args):
+    store = open_managed_store(args)
+    if store is None:
+        return 1
+    if args.scan:
+        print(f"{store.scan()} files indexed", file=sys.stderr)
+    store.refresh_access()
+    for path in store.enforce():
+        print(f"evicted {path}")
+    return 0
+
+def cmd_resume(args):
+    results = resume_unfinished(print_progress, debug=args.debug)
+    sys.stderr.write("\n")
+    for params, success, msg in results:
+        print(f"{'ok' if success else 'FAILED'}  {params['url']}  {msg.splitlines()[-1] if msg else ''}")
+    print(f"{len(results)} interrupted downloads resumed", file=sys.stderr)
+    return 0 if all(success for _p, success, _m in results) else 1
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="yutub", description="Yutub - YouTube Downloader (headless mode)")
+    parser.add_argument("--debug", action="store_true", help="print yt-dlp diagnostics")
+    parser.add_argument("--profile", action="store_true", help="write a profiling report (data/profiles) at exit")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("explore", help="list available formats")
+    p.add_argument("url")
+    p.add_argument("--json", action="store_true", help="print the parsed formats as JSON")
+    p.set_defaults(func=cmd_explore)
+
+    p = sub.add_parser("download", help="download the best format matching a target")
+    p.add_argument("url")
+    add_selection_args(p)
+    add_clip_args(p)
+    add_output_args(p)
+    p.add_argument("--stream-to", metavar="TARGET",
+                   help="send the format to '-' (stdout), a named pipe, tcp:host:port or unix:/path instead of a file")
+    p.set_defaults(func=cmd_download)
+
+    p = sub.add_parser("resume", help="resume downloads interrupted by a crash or reboot")
+    p.set_defaults(func=cmd_resume)
+
+    p = sub.add_parser("subs", help="manage channel/playlist subscriptions")
+    subs_sub = p.add_subparsers(dest="subs_command", required=True)
+    sp = subs_sub.add_parser("add", help="subscribe to a channel or playlist")
+    sp.add_argument("url")
+    sp.add_argument("--name", help="display name")
+    sp.add_argument("--backfill", type=int, default=0, help="also queue the N latest existing entries")
+    add_selection_args(sp)
+    sp.set_defaults(func=cmd_subs_add)
+    sp = subs_sub.add_parser("list", help="list subscriptions")
+    sp.set_defaults(func=cmd_subs_list)
+    sp = subs_sub.add_parser("remove", help="remove a subscription")
+    sp.add_argument("key")
+    sp.set_defaults(func=cmd_subs_remove)
+
+    p = sub.add_parser("sync", help="download new entries of subscriptions")
+    p.add_argument("keys", nargs="*", help="subscription keys (default: all)")
+    p.add_argument("--list-only", action="store_true", help="only record new entries as pending")
+    p.add_argument("--enqueue", action="store_true", help="put new entries in the shared job queue")
+    p.add_argument("--db", help="job queue database (default: config 'queue_db')")
+    add_output_args(p)
+    p.set_defaults(func=cmd_sync)
+
+    p = sub.add_parser("queue", help="manage the shared job queue")
+    p.add_argument("--db", help="job queue database (default: config 'queue_db')")
+    queue_sub = p.add_subparsers(dest="queue_command", required=True)
+    sp = queue_sub.add_parser("add", help="queue downloads")
+    sp.add_argument("urls", nargs="+")
+    sp.add_argument("--max-attempts", type=int, default=3)
+    add_selection_args(sp)
+    add_clip_args(sp)
+    sp.set_defaults(func=cmd_queue_add)
+    sp = queue_sub.add_parser("list", help="show queued jobs")
+    sp.add_argument("--status", choices=["queued", "running", "done", "failed"])
+    sp.set_defaults(func=cmd_queue_list)
+    sp = queue_sub.add_parser("retry", help="queue failed jobs again")
+    sp.set_defaults(func=cmd_queue_retry)
+
+    p = sub.add_parser("store", help="manage the output folder as a cache (config 'store_quota')")
+    p.add_argument("--dir", help="output folder (default: config 'output_dir')")
+    store_sub = p.add_subparsers(dest="store_command", required=True)
+    sp = store_sub.add_parser("status", help="show quota usage")
+    sp.add_argument("--list", action="store_true", help="list files, next to be evicted first")
+    sp.set_defaults(func=cmd_store_status)
+    sp = store_sub.add_parser("pin", help="never evict these files")
+    sp.add_argument("paths", nargs="+")
+    sp.set_defaults(func=cmd_store_pin)
+    sp = store_sub.add_parser("unpin", help="allow evicting these files again")
+    sp.add_argument("paths", nargs="+")
+    sp.set_defaults(func=cmd_store_pin)
+    sp = store_sub.add_parser("evict", help="evict down to the quota now")
+    sp.add_argument("--scan", action="store_true", help="rebuild the index from the folder first")
+    sp.set_defaults(func=cmd_store_evict)
+
+    p = sub.add_parser("worker", help="run jobs from the shared queue")
+    p.add_argument("--db", help="job queue database (default: config 'queue_db')")
+    p.add_argument("--lease", type=float, default=300, help="lease length in seconds (renewed by heartbeats)")
+    p.add_argument("--poll", type=float, default=5, help="seconds between polls of an empty queue")
+    p.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    add_output_args(p)
+    p.set_defaults(func=cmd_worker)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    with profiling.section(f"cli.{args.command}"):
+        return args.func(args)
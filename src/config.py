@@ -0,0 +1,79 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# User settings read from config.json in the project root
+
+import json
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_FILE = os.path.join(PROJECT_ROOT, "config.json")
+
+DEFAULTS = {
+    # Final library folder (may be slow network storage)
+    'output_dir': "downloads",
+    # In-progress, fragment and post-processing files (fast local disk). Keep it
+    # off tmpfs /tmp: resuming after a reboot needs the partial files
+    'scratch_dir': os.path.join("data", "scratch"),
+    # yt-dlp output template, relative to output_dir
+    'filename_template': "%(title)s.%(ext)s",
+    # Shared job queue for worker mode (put it on shared storage for several hosts)
+    'queue_db': os.path.join("data", "queue.sqlite3"),
+    # Pace of new requests to YouTube; backs off automatically on 429/bot checks
+    'max_requests_per_second': 2.0,
+    # Times a rate limited request waits and tries again before failing
+    'rate_limit_retries': 5,
+    # Proxies ("socks5://host:port", "http://...") and/or local source IPs to spread
+    # requests over; "direct" is the plain connection. Empty: direct only
+    'egress_pool': [],
+    # How jobs are assigned to pool members: "least_load" or "round_robin"
+    'egress_strategy': "least_load",
+    # Encoder settings, only used when a conversion can't be a stream copy:
+    # yt-dlp --audio-quality (0 best - 10 worst VBR, or a bitrate like "192K")
+    'audio_quality': "5",
+    # ffmpeg threads per conversion (0: ffmpeg decides)
+    'ffmpeg_threads': 0,
+    # Manage output_dir as a cache of at most this size ("500G"); None: unmanaged
+    'store_quota': None,
+    # Eviction order: "lru" (least recently used) or "size" (size x idle time)
+    'store_policy': "lru",
+    # Disk space always left free in output_dir when the store is managed
+    'store_min_free': "1G",
+    # Finished files hashed and probed (ffprobe) at the same time, process wide
+    'verify_workers': 2,
+    # Times a truncated or unreadable download is fetched again before failing
+    'verify_retries': 1,
+}
+
+PATH_KEYS = ('output_dir', 'scratch_dir', 'queue_db')
+
+def load_config(debug=False):
+    """Defaults overridden by config.json. Relative paths are resolved against the project root."""
+    config = dict(DEFAULTS)
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE) as fh:
+                config.update(json.load(fh))
+        except (ValueError, OSError) as e:
+            if debug: print(f"Ignoring invalid {CONFIG_FILE}: {e}")
+
+    for key in PATH_KEYS:
+        path = os.path.expanduser(str(config[key]))
+        config[key] = path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+    return config
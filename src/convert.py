@@ -0,0 +1,80 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Audio conversion modes: stream copy / remux when possible, transcode only when needed
+
+CONVERT_MODES = {
+    'mp3': "Convert to MP3",
+    'wav': "Convert to WAV",
+    'm4a': "Convert to M4A",
+    'opus': "Convert to OPUS",
+    'mka': "Convert to MKA",
+}
+
+PATH_COPY = "copy"
+PATH_DECODE = "decode"
+PATH_TRANSCODE = "transcode"
+
+# Source codecs each target takes as is (container change only). None: any codec
+COPY_CODECS = {
+    'mp3': ('mp3',),
+    'wav': (),
+    'm4a': ('mp4a', 'aac'),
+    'opus': ('opus',),
+    'mka': None,
+}
+
+def conversion_key(conv_mode):
+    """'Convert to M4A' or 'm4a' -> 'm4a'; None for no conversion ('Original Format')."""
+    if conv_mode in CONVERT_MODES:
+        return conv_mode
+    for key, label in CONVERT_MODES.items():
+        if label == conv_mode:
+            return key
+    return None
+
+def conversion_path(conv_mode, acodec):
+    """How a source with audio codec 'acodec' gets converted: PATH_COPY, PATH_DECODE or PATH_TRANSCODE."""
+    key = conversion_key(conv_mode)
+    if key is None:
+        return PATH_COPY
+    codecs = COPY_CODECS[key]
+    if codecs is None or (acodec and acodec.lower().startswith(codecs)):
+        return PATH_COPY
+    # PCM is lossless: decoding only, no encoder
+    return PATH_DECODE if key == 'wav' else PATH_TRANSCODE
+
+def conversion_args(conv_mode, config):
+    """
+    yt-dlp options for a conversion mode. yt-dlp's audio extractor copies
+    the stream when the source codec already fits the target, so the
+    encoder (with the configured quality and threads) only runs when needed.
+    """
+    key = conversion_key(conv_mode)
+    if key is None:
+        return []
+    if key == 'mka':
+        # Matroska holds any codec: always a remux
+        return ["--remux-video", "mka"]
+    args = ["--extract-audio", "--audio-format", key]
+    if key != 'wav' and config.get('audio_quality') not in (None, ""):
+        args += ["--audio-quality", str(config['audio_quality'])]
+    if config.get('ffmpeg_threads'):
+        args += ["--postprocessor-args", f"ExtractAudio+ffmpeg_o:-threads {int(config['ffmpeg_threads'])}"]
+    return args
@@ -0,0 +1,159 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Pool of outbound proxies / local source addresses shared by all yt-dlp runs
+
+import threading
+import time
+
+DIRECT = "direct"
+
+STRATEGY_LEAST_LOAD = "least_load"
+STRATEGY_ROUND_ROBIN = "round_robin"
+
+def egress_args(spec):
+    """yt-dlp options for a pool entry: a proxy URL, a local IP address, or 'direct'."""
+    if spec == DIRECT:
+        return []
+    if "://" in spec:
+        return ["--proxy", spec]
+    return ["--source-address", spec]
+
+class EgressMember:
+    def __init__(self, spec):
+        self.name = spec
+        self.args = egress_args(spec)
+        self.active = 0
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.ejected_reason = None
+        # Exponentially weighted download throughput in bytes/s
+        self.throughput = None
+        self.samples = 0
+
+    def healthy(self, now):
+        return now >= self.ejected_until
+
+class EgressPool:
+    """
+    Assigns each explore, listing or download to one pool member (least
+    active jobs first, or round robin) and tracks the outcome. A member that
+    gets throttled, keeps failing with network errors or is much slower
+    than the others is ejected for a while (doubling on every ejection) and
+    returns on its own afterwards. If every member is out, the one coming
+    back first is used rather than stalling all jobs.
+    """
+    EJECT_AFTER_FAILURES = 3
+    BASE_EJECT = 60.0
+    MAX_EJECT = 3600.0
+    # Slower than this fraction of the best member's throughput counts as slow
+    SLOW_RATIO = 0.2
+    MIN_SAMPLES = 3
+    EWMA_WEIGHT = 0.3
+
+    def __init__(self, specs=None, strategy=STRATEGY_LEAST_LOAD, debug=False):
+        self.members = [EgressMember(spec) for spec in (specs or [DIRECT])]
+        self.strategy = strategy
+        self.debug = debug
+        self.lock = threading.Lock()
+        self.next_index = 0
+
+    def acquire(self, prefer=None, exclude=()):
+        """
+        Pick a member for a new job and count it as active. 'prefer' is used
+        if healthy; members named in 'exclude' (already tried) are skipped.
+        """
+        with self.lock:
+            now = time.monotonic()
+            allowed = [m for m in self.members if m.name not in exclude] or self.members
+            healthy = [m for m in allowed if m.healthy(now)]
+            chosen = next((m for m in healthy if m.name == prefer), None)
+            if chosen is None and healthy:
+                # Rotate the starting point so ties (and round robin) spread evenly
+                start = self.next_index % len(self.members)
+                self.next_index += 1
+                ordered = self.members[start:] + self.members[:start]
+                candidates = [m for m in ordered if m in healthy]
+                if self.strategy == STRATEGY_ROUND_ROBIN:
+                    chosen = candidates[0]
+                else:
+                    chosen = min(candidates, key=lambda m: m.active)
+            if chosen is None:
+                chosen = min(allowed, key=lambda m: m.ejected_until)
+            chosen.active += 1
+            return chosen
+
+    def release(self, member, ok, throttled=False, nbytes=0, seconds=0.0):
+        """
+        Report a finished job. ok=False is for failures that are the egress'
+        fault (network errors, timeouts); throttled=True for 429/bot checks.
+        nbytes/seconds of a successful download feed the throughput figure.
+        """
+        with self.lock:
+            member.active = max(0, member.active - 1)
+            if throttled:
+                member.failures += 1
+                self._eject(member, "throttled")
+            elif not ok:
+                member.failures += 1
+                member.consecutive_failures += 1
+                if member.consecutive_failures >= self.EJECT_AFTER_FAILURES:
+                    self._eject(member, "failing")
+            else:
+                member.successes += 1
+                member.consecutive_failures = 0
+                member.ejections = 0
+                if nbytes > 0 and seconds > 0:
+                    self._record_throughput(member, nbytes / seconds)
+
+    def _record_throughput(self, member, rate):
+        if member.throughput is None:
+            member.throughput = rate
+        else:
+            member.throughput += self.EWMA_WEIGHT * (rate - member.throughput)
+        member.samples += 1
+        measured = [m.throughput for m in self.members if m.samples >= self.MIN_SAMPLES]
+        if member.samples >= self.MIN_SAMPLES and len(measured) > 1 and member.throughput < self.SLOW_RATIO * max(measured):
+            self._eject(member, "slow")
+            # Judge it afresh when it comes back
+            member.samples = 0
+            member.throughput = None
+
+    def _eject(self, member, reason):
+        member.ejections += 1
+        member.consecutive_failures = 0
+        duration = min(self.MAX_EJECT, self.BASE_EJECT * 2 ** (member.ejections - 1))
+        member.ejected_until = time.monotonic() + duration
+        member.ejected_reason = reason
+        if self.debug: print(f"Egress {member.name} ejected for {duration:.0f}s ({reason})")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_egress_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from .config import load_config
+            config = load_config()
+            _pool = EgressPool(config['egress_pool'], config['egress_strategy'])
+        return _pool
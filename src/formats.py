@@ -0,0 +1,257 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Format parsing and automatic format selection
+
+import re
+
+# Codec families accepted by the "prefer" option, mapped to yt-dlp codec prefixes
+CODEC_ALIASES = {
+    'av1': ('av01',),
+    'vp9': ('vp9', 'vp09'),
+    'h264': ('avc1', 'h264'),
+    'avc': ('avc1', 'h264'),
+    'hevc': ('hvc1', 'hev1', 'h265'),
+    'h265': ('hvc1', 'hev1', 'h265'),
+    'opus': ('opus',),
+    'aac': ('mp4a', 'aac'),
+    'mp4a': ('mp4a',),
+    'vorbis': ('vorbis',),
+}
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+def format_size(num_bytes, approx=False):
+    """Human readable size in the same style yt-dlp uses (e.g. 12.34MiB)."""
+    if num_bytes is None:
+        return "Unknown"
+    size = float(num_bytes)
+    for unit in ['B', 'KiB', 'MiB', 'GiB']:
+        if size < 1024 or unit == 'GiB':
+            break
+        size /= 1024
+    txt = f"{int(size)}B" if unit == 'B' else f"{size:.2f}{unit}"
+    return f"≈{txt}" if approx else txt
+
+def parse_size(value):
+    """Parse a size such as '500M', '1.5G', '700MiB' or '123456' into bytes."""
+    match = re.fullmatch(r'\s*(\d+\.?\d*)\s*([kKmMgGtT]?)(?:i?[bB])?\s*', str(value))
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+def parse_height(value):
+    """Parse a resolution target such as '1080p', '1080' or '1920x1080' into a height."""
+    match = re.fullmatch(r'\s*(?:\d+x)?(\d+)[pP]?\s*', str(value))
+    if not match:
+        raise ValueError(f"Invalid resolution: {value}")
+    return int(match.group(1))
+
+def parse_kbps(value):
+    """Parse a bitrate such as '128k', '128kbps' or '128' into kbps."""
+    match = re.fullmatch(r'\s*(\d+\.?\d*)\s*(?:k|kbps|K)?\s*', str(value))
+    if not match:
+        raise ValueError(f"Invalid bitrate: {value}")
+    return float(match.group(1))
+
+def _codec(value):
+    # yt-dlp reports missing streams as 'none'
+    if not value or value == 'none':
+        return None
+    return value
+
+def normalize_formats(raw_formats, duration=None):
+    """
+    Reduce the 'formats' list of yt-dlp's info JSON to the fields used for
+    ranking. Storyboards and other formats without audio or video are skipped.
+    """
+    formats = []
+    for f in raw_formats or []:
+        vcodec = _codec(f.get('vcodec'))
+        acodec = _codec(f.get('acodec'))
+        if not vcodec and not acodec:
+            continue
+        if f.get('protocol') == 'mhtml':
+            continue
+
+        tbr = f.get('tbr') or ((f.get('vbr') or 0) + (f.get('abr') or 0)) or None
+        filesize = f.get('filesize')
+        approx = False
+        if not filesize:
+            filesize = f.get('filesize_approx')
+            approx = True
+        if not filesize and tbr and duration:
+            # kbps * seconds -> bytes
+            filesize = int(tbr * 1000 / 8 * duration)
+            approx = True
+
+        formats.append({
+            'format_id': str(f.get('format_id')),
+            'ext': f.get('ext') or "",
+            'width': f.get('width'),
+            'height': f.get('height') if vcodec else None,
+            'fps': f.get('fps'),
+            'vcodec': vcodec,
+            'acodec': acodec,
+            'abr': f.get('abr') or (None if vcodec else tbr),
+            'asr': f.get('asr'),
+            'tbr': tbr,
+            'filesize': int(filesize) if filesize else None,
+            'approx': approx and bool(filesize),
+            'protocol': f.get('protocol'),
+        })
+    return formats
+
+def build_display_lists(formats):
+    """Split normalized formats into the (video, audio) rows shown in the UI."""
+    video_formats = []
+    audio_formats = []
+    for f in formats:
+        size = format_size(f['filesize'], f['approx'])
+        if not f['vcodec']:
+            abr = f"{int(f['abr'])}k" if f['abr'] else "N/A"
+            asr = f"{int(f['asr']) // 1000}k" if f['asr'] else "N/A"
+            audio_formats.append({
+                'format_id': f['format_id'],
+                'ext': f['ext'],
+                'quality': f"{abr} - {asr}",
+                'size': size,
+                'selector': f['format_id'],
+            })
+            continue
+
+        if f['ext'].lower() not in ['mp4', 'webm']:
+            continue
+        if f['width'] and f['height']:
+            resolution = f"{f['width']}x{f['height']}"
+        else:
+            resolution = f"{f['height']}p" if f['height'] else "N/A"
+        codec = f['vcodec'].split('.')[0]
+        video_only = not f['acodec']
+        video_formats.append({
+            'format_id': f['format_id'],
+            'ext': f['ext'],
+            'res': f"{resolution} ({codec}{', +audio' if video_only else ''})",
+            'size': size,
+            # Video only streams are merged with the best audio by ffmpeg
+            'selector': f"{f['format_id']}+bestaudio" if video_only else f['format_id'],
+        })
+    return video_formats, audio_formats
+
+def _matches_codec(codec, prefer_codecs):
+    if not codec or not prefer_codecs:
+        return False
+    codec = codec.lower()
+    for name in prefer_codecs:
+        prefixes = CODEC_ALIASES.get(name.lower(), (name.lower(),))
+        if codec.startswith(prefixes):
+            return True
+    return False
+
+def _candidates(formats, audio_only=False):
+    """All downloadable choices: muxed formats and video-only + audio-only pairs."""
+    videos = [f for f in formats if f['vcodec'] and not f['acodec']]
+    audios = [f for f in formats if f['acodec'] and not f['vcodec']]
+    muxed = [f for f in formats if f['vcodec'] and f['acodec']]
+
+    if audio_only:
+        for a in audios:
+            yield {'selector': a['format_id'], 'video': None, 'audio': a}
+        return
+    for m in muxed:
+        yield {'selector': m['format_id'], 'video': m, 'audio': m}
+    for v in videos:
+        for a in audios:
+            yield {'selector': f"{v['format_id']}+{a['format_id']}", 'video': v, 'audio': a}
+
+def _describe(candidate):
+    v, a = candidate['video'], candidate['audio']
+    sizes = [f['filesize'] for f in {id(x): x for x in (v, a) if x}.values()]
+    rates = [f['tbr'] for f in {id(x): x for x in (v, a) if x}.values()]
+    candidate['filesize'] = sum(sizes) if all(sizes) else None
+    candidate['tbr'] = sum(rates) if all(rates) else None
+    candidate['height'] = v['height'] if v else None
+    candidate['vcodec'] = v['vcodec'] if v else None
+    candidate['acodec'] = a['acodec'] if a else None
+    candidate['abr'] = a['abr'] if a else None
+    return candidate
+
+def select_formats(formats, height=None, min_abr=None, prefer_codecs=None,
+                   max_bytes=None, max_kbps=None, audio_only=False):
+    """
+    Pick the cheapest download meeting a quality target.
+
+    With a target (height and/or min_abr) the smallest candidate that reaches it
+    wins; with only a budget (max_bytes/max_kbps) the best quality that fits wins.
+    Preferred codecs (e.g. ['vp9', 'av1']) are chosen over others when both qualify
+    at the same resolution; a height target never goes up a resolution for them.
+    Returns a candidate dict with a yt-dlp 'selector' (e.g. '248+251'), or None.
+    """
+    qualifying = []
+    for c in _candidates(formats, audio_only):
+        c = _describe(c)
+        if height and (c['height'] or 0) < height:
+            continue
+        if min_abr and (c['abr'] or 0) < min_abr:
+            continue
+        if max_bytes and (c['filesize'] is None or c['filesize'] > max_bytes):
+            continue
+        if max_kbps and (c['tbr'] is None or c['tbr'] > max_kbps):
+            continue
+        codec = c['acodec'] if audio_only else c['vcodec']
+        c['preferred'] = _matches_codec(codec, prefer_codecs)
+        qualifying.append(c)
+
+    if not qualifying:
+        return None
+
+    unknown = float('inf')
+    if height or min_abr:
+        # Lowest qualifying resolution first: 2160p vp9 is no match for a 1080p target
+        key = lambda c: ((c['height'] or 0) if height else 0, not c['preferred'], c['filesize'] or unknown)
+    else:
+        key = lambda c: (-(c['height'] or 0), -(c['abr'] or 0), not c['preferred'], c['filesize'] or unknown)
+    return min(qualifying, key=key)
+
+def estimate_size(formats, selector):
+    """Bytes a selector such as '248+bestaudio,140' will download, or None if a part is unknown."""
+    by_id = {f['format_id']: f for f in formats}
+    audios = [f for f in formats if f['acodec'] and not f['vcodec']]
+    total = 0
+    for part in selector.split(","):
+        for format_id in part.split("+"):
+            if format_id == "bestaudio" and audios:
+                fmt = max(audios, key=lambda a: a['abr'] or 0)
+            else:
+                fmt = by_id.get(format_id)
+            if not fmt or not fmt['filesize']:
+                return None
+            total += fmt['filesize']
+    return total
+
+def describe_selection(candidate):
+    """One line summary of a selected candidate for status messages."""
+    parts = [candidate['selector']]
+    if candidate['height']:
+        parts.append(f"{candidate['height']}p")
+    codecs = [c.split('.')[0] for c in (candidate['vcodec'], candidate['acodec']) if c]
+    if codecs:
+        parts.append("/".join(codecs))
+    parts.append(format_size(candidate['filesize']))
+    return " ".join(parts)
@@ -0,0 +1,109 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Process wide rate limiting of requests to YouTube
+
+import random
+import threading
+import time
+
+class RateGovernor:
+    """
+    Shared by every explore, download and listing in the process that goes
+    out through the same egress (proxy or source address, see egress.py).
+
+    New requests are paced by a token bucket. When YouTube answers with a
+    429 or a bot check, all callers back off together (exponential, with
+    jitter) and the request rate is halved; every clean response then raises
+    the rate again by a small step until max_rate is reached.
+    """
+    def __init__(self, max_rate=2.0, min_rate=0.05, ramp_step=0.05, base_backoff=5.0, max_backoff=600.0, retries=5):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.ramp_step = ramp_step
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.retries = retries
+
+        self.cond = threading.Condition()
+        self.rate = max_rate
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_throttle = 0.0
+        self.strikes = 0
+
+    def _refill(self, now):
+        capacity = max(1.0, self.rate)
+        self.tokens = min(capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def wait_time(self):
+        """Seconds until a new request may start."""
+        with self.cond:
+            now = time.monotonic()
+            self._refill(now)
+            backoff = max(0.0, self.blocked_until - now)
+            pacing = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            return max(backoff, pacing)
+
+    def acquire(self):
+        """Block until a request may start. Returns its start time for report()."""
+        with self.cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    self.cond.wait(self.blocked_until - now)
+                    continue
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return now
+                self.cond.wait((1 - self.tokens) / self.rate)
+
+    def report(self, started, throttled):
+        """Feed back the outcome of a request started at 'started' (from acquire())."""
+        with self.cond:
+            now = time.monotonic()
+            if throttled:
+                # Requests already in flight when the last backoff began don't escalate it again
+                if started >= self.last_throttle:
+                    self.strikes += 1
+                    delay = min(self.max_backoff, self.base_backoff * 2 ** (self.strikes - 1))
+                    self.blocked_until = max(self.blocked_until, now + delay * random.uniform(0.5, 1.5))
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self.tokens = 0.0
+                    self.last_throttle = now
+            else:
+                self.strikes = 0
+                self.rate = min(self.max_rate, self.rate + self.ramp_step)
+            self.cond.notify_all()
+
+_governors = {}
+_governor_lock = threading.Lock()
+
+def get_governor(egress="direct"):
+    """Governor of one egress: YouTube throttles per IP, so each has its own pace and backoff."""
+    with _governor_lock:
+        if egress not in _governors:
+            from .config import load_config
+            config = load_config()
+            _governors[egress] = RateGovernor(max_rate=float(config['max_requests_per_second']),
+                                              retries=int(config['rate_limit_retries']))
+        return _governors[egress]
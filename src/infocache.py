@@ -0,0 +1,88 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Info JSON kept from Explore so downloads can skip a second extraction
+
+import hashlib
+import os
+import re
+import time
+from urllib.parse import urlparse, parse_qs
+
+# Used when no stream URL says when it expires (YouTube signs them for ~6h)
+DEFAULT_TTL = 5 * 3600
+# Don't start a download on URLs about to expire: long downloads would break halfway
+EXPIRY_MARGIN = 15 * 60
+
+def info_dir():
+    from .utils import get_data_dir
+    path = os.path.join(get_data_dir(), "info")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def stream_expiry(info, fetched=None):
+    """Earliest 'expire=' timestamp among the stream URLs of an info dict."""
+    fetched = fetched or info.get('epoch') or time.time()
+    expiries = []
+    for fmt in info.get('formats') or []:
+        for key in ('url', 'manifest_url', 'fragment_base_url'):
+            value = fmt.get(key)
+            if not value:
+                continue
+            expire = parse_qs(urlparse(value).query).get('expire', [None])[0]
+            if expire is None:
+                # Manifest URLs carry it as a path segment
+                match = re.search(r"/expire/(\d+)", value)
+                expire = match.group(1) if match else None
+            if expire and expire.isdigit():
+                expiries.append(int(expire))
+    return min(expiries) if expiries else fetched + DEFAULT_TTL
+
+def save_info(url, raw_json, info):
+    """
+    Store the raw info JSON of an explored URL. Returns {'path', 'expires', 'duration'}
+    for download_format(info_json=...). Expired files are pruned on the way.
+    """
+    prune()
+    path = os.path.join(info_dir(), f"{hashlib.sha1(url.encode()).hexdigest()[:16]}.json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        fh.write(raw_json)
+    os.replace(tmp, path)
+    return {'path': path, 'expires': stream_expiry(info), 'duration': info.get('duration')}
+
+def usable_info(info_json):
+    """Path of a stored info JSON whose stream URLs are still valid, else None."""
+    if not info_json or not os.path.exists(info_json.get('path', "")):
+        return None
+    if time.time() > info_json.get('expires', 0) - EXPIRY_MARGIN:
+        return None
+    return info_json['path']
+
+def prune(max_age=DEFAULT_TTL * 2):
+    """Remove info files old enough that their stream URLs can't be valid anymore."""
+    folder = info_dir()
+    now = time.time()
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+        except OSError:
+            continue
@@ -0,0 +1,86 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Unattended jobs: explore, pick a format from saved preferences and download
+
+from .utils import get_video_info, download_format
+from .formats import select_formats, describe_selection
+from .convert import CONVERT_MODES, conversion_path, PATH_COPY
+
+# Format preferences as stored with subscriptions and queued jobs
+DEFAULT_PREFS = {
+    'format': None,
+    'height': None,
+    'min_abr': None,
+    'prefer': [],
+    'max_size': None,
+    'max_kbps': None,
+    'audio_only': False,
+    'convert': None,
+    # Time ranges ('*60-150') or chapter title regexes; empty for the whole video
+    'sections': [],
+    'accurate_cuts': False,
+}
+
+def make_prefs(**kwargs):
+    prefs = dict(DEFAULT_PREFS)
+    prefs.update({k: v for k, v in kwargs.items() if k in DEFAULT_PREFS})
+    return prefs
+
+def select_for_prefs(info, prefs, single_file=False):
+    """
+    Return (selector, summary) for explored info, or (None, None) if nothing
+    matches. single_file leaves out video only streams (they need a merge).
+    """
+    if prefs.get('format'):
+        return prefs['format'], prefs['format']
+    def select(formats):
+        return select_formats(formats, height=prefs.get('height'), min_abr=prefs.get('min_abr'),
+                              prefer_codecs=prefs.get('prefer'), max_bytes=prefs.get('max_size'),
+                              max_kbps=prefs.get('max_kbps'),
+                              audio_only=prefs.get('audio_only') or bool(prefs.get('convert')))
+
+    formats = info.get('formats', [])
+    if single_file:
+        formats = [f for f in formats if f['acodec']]
+    candidate = None
+    if prefs.get('convert') and not prefs.get('prefer'):
+        # A source the conversion only copies beats a slightly better one that must be re-encoded
+        candidate = select([f for f in formats if conversion_path(prefs['convert'], f['acodec']) == PATH_COPY])
+    if candidate is None:
+        candidate = select(formats)
+    if candidate is None:
+        return None, None
+    return candidate['selector'], describe_selection(candidate)
+
+def run_job(url, prefs, progress_callback=None, debug=False, **download_kwargs):
+    """Explore url, select a format from prefs and download it. Returns (success, message)."""
+    info = get_video_info(url, debug=debug)
+    if 'error' in info:
+        return False, f"[{info.get('error_type', 'unknown')}] {info['error']}"
+
+    selector, summary = select_for_prefs(info, prefs)
+    if selector is None:
+        return False, "No format matches the requested target."
+    if debug: print(f"Selected for {url}: {summary}")
+
+    return download_format(url, selector, progress_callback, CONVERT_MODES.get(prefs.get('convert')),
+                           info.get('auth_args'), debug=debug, sections=prefs.get('sections'),
+                           accurate_cuts=prefs.get('accurate_cuts', False), info_json=info.get('info_json'),
+                           **download_kwargs)
@@ -0,0 +1,254 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Crash-safe journal of started downloads, used to resume them after a restart
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from .config import load_config
+from .utils import get_data_dir, download_format
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: single process use only
+    fcntl = None
+
+_journal = None
+
+class JobJournal:
+    """
+    Append-only JSON lines file. Every download writes a 'start' record with
+    all its parameters before it begins and a 'finish' record when it ends;
+    a 'start' without 'finish' is either still running in some Yutub
+    process or was interrupted by a crash. The running process holds a lock
+    file per job for the whole download (released by the OS if it dies), so
+    only jobs whose lock is free are resumed. Records are fsync'ed, a torn
+    last line is ignored, and the file is compacted down to the unfinished
+    jobs every COMPACT_EVERY finishes.
+    """
+    COMPACT_EVERY = 50
+    MAX_RESUMES = 3
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.finished_since_compact = 0
+        self.locks_dir = os.path.join(os.path.dirname(path), "journal-locks")
+
+    @contextmanager
+    def _locked(self):
+        # Thread lock plus an advisory file lock shared with other Yutub processes
+        with self.lock:
+            with open(f"{self.path}.lock", "a") as lock_fh:
+                if fcntl: fcntl.flock(lock_fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl: fcntl.flock(lock_fh, fcntl.LOCK_UN)
+
+    def _append(self, record):
+        line = json.dumps(record) + "\n"
+        with self._locked():
+            with open(self.path, "a") as fh:
+                fh.write(line)
+                fh.flush()
+                os.fsync(fh.fileno())
+
+    @contextmanager
+    def job_lock(self, job_id, blocking=True):
+        """
+        Hold the job's lock file. Yields False (without waiting) when
+        blocking=False and another thread or process owns the job.
+        """
+        os.makedirs(self.locks_dir, exist_ok=True)
+        path = os.path.join(self.locks_dir, f"{job_id}.lock")
+        with open(path, "a") as lock_fh:
+            if fcntl:
+                try:
+                    fcntl.flock(lock_fh, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    yield False
+                    return
+            try:
+                yield True
+            finally:
+                if fcntl: fcntl.flock(lock_fh, fcntl.LOCK_UN)
+
+    def _release_lock_file(self, job_id):
+        try:
+            os.remove(os.path.join(self.locks_dir, f"{job_id}.lock"))
+        except OSError:
+            pass
+
+    def _read(self):
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path) as fh:
+            for line in fh:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Torn write from a crash mid-append
+                    continue
+        return records
+
+    def start(self, params, job_id=None):
+        """Record a new job. Take job_lock(job_id) first so no other process sees it as dead."""
+        job_id = job_id or uuid.uuid4().hex
+        owner = {'pid': os.getpid(), 'host': socket.gethostname()}
+        self._append({'op': "start", 'id': job_id, 'params': params, 'owner': owner, 'ts': time.time()})
+        return job_id
+
+    def resumed(self, job_id):
+        self._append({'op': "resume", 'id': job_id, 'ts': time.time()})
+
+    def finish(self, job_id, success, message=""):
+        self._append({'op': "finish", 'id': job_id, 'success': success, 'message': message[-500:], 'ts': time.time()})
+        self._release_lock_file(job_id)
+        self.finished_since_compact += 1
+        if self.finished_since_compact >= self.COMPACT_EVERY:
+            self.compact()
+
+    def _unfinished(self, records):
+        jobs = {}
+        for rec in records:
+            if rec.get('op') == "start":
+                jobs[rec['id']] = {'id': rec['id'], 'params': rec['params'], 'owner': rec.get('owner'),
+                                   'resumes': 0, 'ts': rec['ts']}
+            elif rec.get('op') == "resume" and rec['id'] in jobs:
+                jobs[rec['id']]['resumes'] += 1
+            elif rec.get('op') == "finish":
+                jobs.pop(rec['id'], None)
+        return list(jobs.values())
+
+    def unfinished(self):
+        """Jobs that were started but never finished (running or interrupted), oldest first."""
+        with self._locked():
+            return self._unfinished(self._read())
+
+    def is_unfinished(self, job_id):
+        return any(job['id'] == job_id for job in self.unfinished())
+
+    def owner_alive(self, job):
+        """True if the process that started (or resumed) the job is still running it."""
+        if fcntl is None:
+            # No file locks (Windows): only this process' own jobs are known to be alive
+            owner = job.get('owner') or {}
+            return owner.get('pid') == os.getpid() and owner.get('host') == socket.gethostname()
+        with self.job_lock(job['id'], blocking=False) as acquired:
+            return not acquired
+
+    def interrupted(self):
+        """Unfinished jobs no live process is working on."""
+        return [job for job in self.unfinished() if not self.owner_alive(job)]
+
+    def compact(self):
+        """Rewrite the journal keeping only the records of unfinished jobs."""
+        with self._locked():
+            keep = []
+            for job in self._unfinished(self._read()):
+                keep.append({'op': "start", 'id': job['id'], 'params': job['params'], 'owner': job['owner'],
+                             'ts': job['ts']})
+                keep.extend({'op': "resume", 'id': job['id'], 'ts': job['ts']} for _ in range(job['resumes']))
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as fh:
+                for rec in keep:
+                    fh.write(json.dumps(rec) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path)
+            self.finished_since_compact = 0
+
+def get_journal():
+    global _journal
+    if _journal is None:
+        _journal = JobJournal(os.path.join(get_data_dir(), "journal.jsonl"))
+    return _journal
+
+def download_params(url, format_id, conv_mode=None, auth_args=None, output_dir=None, scratch_dir=None, template=None,
+                    sections=None, accurate_cuts=False, info_json=None):
+    """
+    download_format arguments with the configured paths resolved, so a
+    resumed job reuses the same scratch folder (and its .part files).
+    A resume long after the explore finds info_json expired and re-extracts.
+    """
+    config = load_config()
+    return {
+        'url': url,
+        'format_id': format_id,
+        'conv_mode': conv_mode,
+        'auth_args': auth_args,
+        'output_dir': output_dir or config['output_dir'],
+        'scratch_dir': scratch_dir or config['scratch_dir'],
+        'template': template or config['filename_template'],
+        'sections': sections or [],
+        'accurate_cuts': accurate_cuts,
+        'info_json': info_json,
+    }
+
+def journaled_download(params, progress_callback=None, debug=False):
+    """download_format(**params) recorded in the journal. Returns (success, message)."""
+    journal = get_journal()
+    job_id = uuid.uuid4().hex
+    with journal.job_lock(job_id):
+        journal.start(params, job_id)
+        success, msg = download_format(progress_callback=progress_callback, debug=debug, **params)
+        journal.finish(job_id, success, msg)
+    return success, msg
+
+def _resume_job(journal, job, progress_callback, debug):
+    """Run an interrupted job under its lock. Returns (success, message), or None if someone else took it."""
+    with journal.job_lock(job['id'], blocking=False) as acquired:
+        # Another process may have resumed or finished it since the journal was read
+        if not acquired or not journal.is_unfinished(job['id']):
+            return None
+        if debug: print(f"Resuming interrupted download {job['id']}: {job['params']['url']}")
+        journal.resumed(job['id'])
+        success, msg = download_format(progress_callback=progress_callback, debug=debug, **job['params'])
+        journal.finish(job['id'], success, msg)
+    return success, msg
+
+def resume_unfinished(progress_callback=None, debug=False):
+    """
+    Run every interrupted download again. yt-dlp continues from the .part
+    files left in the job's scratch folder. Jobs still running in another
+    Yutub process (GUI, CLI or worker) are left alone. A job that keeps
+    dying is given up after MAX_RESUMES attempts. Returns a list of
+    (params, success, message).
+    """
+    journal = get_journal()
+    results = []
+    for job in journal.interrupted():
+        if job['resumes'] >= journal.MAX_RESUMES:
+            with journal.job_lock(job['id'], blocking=False) as acquired:
+                if acquired and journal.is_unfinished(job['id']):
+                    journal.finish(job['id'], False, "Given up after repeated interruptions")
+            continue
+        outcome = _resume_job(journal, job, progress_callback, debug)
+        if outcome is not None:
+            results.append((job['params'],) + outcome)
+    journal.compact()
+    return results
@@ -10,6 +10,12 @@ STRINGS = {
         "explore": "Explore",
         "exploring": "Exploring formats...",
         "explore_failed": "Explore failed",
+        "cause_auth": "authentication required",
+        "cause_network": "network error",
+        "cause_unavailable": "video unavailable",
+        "cause_rate_limited": "rate limited by YouTube",
+        "cause_extractor": "yt-dlp extractor error",
+        "cause_unknown": "unknown error",
         "fetched": "Fetched: ",
         
         "video_header": "Video Qualities",
@@ -23,7 +29,18 @@ STRINGS = {
         "get_video": "Get Video",
         "get_audio": "Get Audio Only",
         "convert_label": "Convert",
-        "convert_opts": ["Original Format", "Convert to MP3", "Convert to WAV"],
+        "convert_opts": ["Original Format", "Convert to MP3", "Convert to WAV", "Convert to M4A", "Convert to OPUS", "Convert to MKA"],
+        "conv_path_copy": "stream copy",
+        "conv_path_decode": "decode to PCM",
+        "conv_path_transcode": "re-encode",
+        "auto_label": "Best Match",
+        "auto_targets": ["Best", "2160p", "1440p", "1080p", "720p", "480p", "360p"],
+        "auto_codecs": ["Any Codec", "Prefer VP9/AV1", "Prefer H.264"],
+        "get_best": "Get Best Match",
+        "clip_label": "Clip",
+        "clip_whole": "Whole video",
+        "clip_range": "Range (1:00-2:30)",
+        "clip_accurate": "Accurate cuts",
         
         "footer": "Developed by Octavio Rossell Tabet octavio.rossell@gmail.com https://github.com/octaviotron/yutub",
         
@@ -32,16 +49,32 @@ STRINGS = {
         "w_select": "Selection Error",
         "m_select_video": "Please select a video quality first.",
         "m_select_audio": "Please select an audio format first.",
+        "m_no_match": "No format matches the selected target.",
+        "m_clip_range": "Invalid time range. Use start-end, e.g. 1:00-2:30.",
         
         "status_start": "Starting download...",
         "status_downloading": "Downloading: ",
         "status_converting": "Converting...",
         "status_done": "Download Finished",
         "status_fail": "Download Failed",
+        "status_resuming": "Resuming {count} interrupted download(s)...",
+        "status_resuming_dl": "Resuming: ",
+        "status_resumed": "Resumed downloads: {count} finished, {failed} failed",
         
         "s_success": "Success",
-        "m_success": "File downloaded successfully to 'downloads' folder!",
+        "m_success": "File downloaded successfully:\n{path}",
         "err_title": "Error",
+
+        "subs_button": "Subscriptions",
+        "subs_title": "Subscriptions",
+        "subs_add": "Subscribe",
+        "subs_adding": "Reading channel...",
+        "subs_remove": "Remove",
+        "subs_sync": "Sync All",
+        "subs_done": "Sync finished: {downloaded} downloaded, {failed} failed",
+        "col_source": "Channel / Playlist",
+        "col_pending": "Pending",
+        "col_last_sync": "Last Sync",
     },
     "ES": {
         "title": "Yutub - Descargador de YouTube",
@@ -54,6 +87,12 @@ STRINGS = {
         "explore": "Explorar",
         "exploring": "Explorando formatos...",
         "explore_failed": "Fallo al explorar",
+        "cause_auth": "se requiere autenticación",
+        "cause_network": "error de red",
+        "cause_unavailable": "video no disponible",
+        "cause_rate_limited": "límite de peticiones de YouTube",
+        "cause_extractor": "error del extractor de yt-dlp",
+        "cause_unknown": "error desconocido",
         "fetched": "Obtenido: ",
         
         "video_header": "Calidades de Video",
@@ -67,7 +106,18 @@ STRINGS = {
         "get_video": "Descargar Video",
         "get_audio": "Descargar Audio",
         "convert_label": "Convertir",
-        "convert_opts": ["Formato Original", "Convertir a MP3", "Convertir a WAV"],
+        "convert_opts": ["Formato Original", "Convertir a MP3", "Convertir a WAV", "Convertir a M4A", "Convertir a OPUS", "Convertir a MKA"],
+        "conv_path_copy": "copia directa",
+        "conv_path_decode": "decodificar a PCM",
+        "conv_path_transcode": "recodificar",
+        "auto_label": "Mejor Opción",
+        "auto_targets": ["Máxima", "2160p", "1440p", "1080p", "720p", "480p", "360p"],
+        "auto_codecs": ["Cualquier Códec", "Preferir VP9/AV1", "Preferir H.264"],
+        "get_best": "Descargar Mejor Opción",
+        "clip_label": "Recorte",
+        "clip_whole": "Video completo",
+        "clip_range": "Rango (1:00-2:30)",
+        "clip_accurate": "Cortes precisos",
         
         "footer": "Desarrollado por Octavio Rossell Tabet octavio.rossell@gmail.com https://github.com/octaviotron/yutub",
         
@@ -76,15 +126,31 @@ STRINGS = {
         "w_select": "Error de Selección",
         "m_select_video": "Por favor seleccione una calidad de video primero.",
         "m_select_audio": "Por favor seleccione un formato de audio primero.",
+        "m_no_match": "Ningún formato coincide con el objetivo seleccionado.",
+        "m_clip_range": "Rango de tiempo inválido. Use inicio-fin, p. ej. 1:00-2:30.",
         
         "status_start": "Iniciando descarga...",
         "status_downloading": "Descargando: ",
         "status_converting": "Convirtiendo...",
         "status_done": "Descarga Finalizada",
         "status_fail": "Descarga Fallida",
+        "status_resuming": "Reanudando {count} descarga(s) interrumpida(s)...",
+        "status_resuming_dl": "Reanudando: ",
+        "status_resumed": "Descargas reanudadas: {count} finalizadas, {failed} fallidas",
         
         "s_success": "Éxito",
-        "m_success": "¡Archivo descargado exitosamente en la carpeta 'downloads'!",
+        "m_success": "¡Archivo descargado exitosamente!\n{path}",
         "err_title": "Error",
+
+        "subs_button": "Suscripciones",
+        "subs_title": "Suscripciones",
+        "subs_add": "Suscribir",
+        "subs_adding": "Leyendo canal...",
+        "subs_remove": "Eliminar",
+        "subs_sync": "Sincronizar Todo",
+        "subs_done": "Sincronización finalizada: {downloaded} descargados, {failed} fallidos",
+        "col_source": "Canal / Lista",
+        "col_pending": "Pendientes",
+        "col_last_sync": "Última Sincronización",
     }
 }
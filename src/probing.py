@@ -0,0 +1,122 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# yt-dlp error classification and adaptive probe timeouts
+
+import json
+import os
+import re
+import threading
+
+ERR_AUTH = "auth"
+ERR_NETWORK = "network"
+ERR_UNAVAILABLE = "unavailable"
+ERR_RATE_LIMITED = "rate_limited"
+ERR_EXTRACTOR = "extractor"
+ERR_UNKNOWN = "unknown"
+
+# Checked in order: the first matching category wins. The bot check must not be
+# mistaken for a login issue. Private videos are 'auth' even when worded as
+# unavailable: whether one is visible depends on the browser account's cookies.
+ERROR_PATTERNS = [
+    (ERR_RATE_LIMITED, [
+        r"HTTP Error 429", r"Too Many Requests", r"not a bot", r"rate.?limit",
+    ]),
+    (ERR_AUTH, [
+        r"Private video", r"video is private",
+    ]),
+    (ERR_UNAVAILABLE, [
+        r"Video unavailable", r"has been removed", r"no longer available",
+        r"not available in your country", r"geo.?restrict", r"account .* terminated",
+        r"Incomplete YouTube ID", r"is not a valid URL", r"Unsupported URL", r"HTTP Error 404",
+    ]),
+    (ERR_NETWORK, [
+        r"Unable to download webpage", r"urlopen error", r"Connection refused", r"Connection reset",
+        r"Name or service not known", r"Temporary failure in name resolution", r"getaddrinfo failed",
+        r"Network is unreachable", r"No route to host", r"timed out", r"RemoteDisconnected",
+        r"SSL: ", r"HTTP Error 5\d\d",
+    ]),
+    (ERR_AUTH, [
+        r"Sign in", r"[Ll]ogin", r"members.only", r"[Jj]oin this channel", r"cookies",
+        r"keyring", r"secretstorage", r"[Ff]ailed to decrypt", r"HTTP Error 403",
+    ]),
+    (ERR_EXTRACTOR, [
+        r"Unable to extract", r"please report this issue", r"ExtractorError", r"nsig extraction failed",
+        r"[Ss]ignature extraction failed", r"JS challenge", r"[Ff]ailed to parse JSON",
+    ]),
+]
+
+# Strategies are only worth retrying when the failure may depend on the cookies used
+RETRYABLE_ERRORS = (ERR_AUTH, ERR_UNKNOWN)
+
+def classify_error(stderr):
+    """Map yt-dlp stderr output to one of the ERR_* categories."""
+    if not stderr:
+        return ERR_UNKNOWN
+    for category, patterns in ERROR_PATTERNS:
+        for pattern in patterns:
+            if re.search(pattern, stderr):
+                return category
+    return ERR_UNKNOWN
+
+class LatencyTracker:
+    """
+    Keeps the durations of recent successful probes and derives the timeout
+    for the next one from them. History is persisted to a small JSON file so
+    short lived headless runs also benefit from it.
+    """
+    DEFAULT_TIMEOUT = 90.0
+    MIN_TIMEOUT = 20.0
+    MIN_SAMPLES = 5
+    HISTORY_SIZE = 50
+    FACTOR = 3.0
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.samples = []
+        if path and os.path.exists(path):
+            try:
+                with open(path) as fh:
+                    self.samples = [float(s) for s in json.load(fh)][-self.HISTORY_SIZE:]
+            except (ValueError, TypeError, OSError):
+                self.samples = []
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+            self.samples = self.samples[-self.HISTORY_SIZE:]
+            samples = list(self.samples)
+        if self.path:
+            try:
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w") as fh:
+                    json.dump(samples, fh)
+                os.replace(tmp, self.path)
+            except OSError:
+                pass
+
+    def timeout(self):
+        """A multiple of the 95th percentile latency, clamped to [MIN_TIMEOUT, DEFAULT_TIMEOUT]."""
+        with self.lock:
+            samples = sorted(self.samples)
+        if len(samples) < self.MIN_SAMPLES:
+            return self.DEFAULT_TIMEOUT
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return max(self.MIN_TIMEOUT, min(self.DEFAULT_TIMEOUT, p95 * self.FACTOR))
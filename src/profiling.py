@@ -0,0 +1,177 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Built-in profiling mode (cProfile + tracemalloc), off unless enabled
+
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+class Profiler:
+    """
+    Collects, for each named section (explore, format parsing, the download
+    output loop, Tk handlers...), the wall time and the CPU time of the
+    calling thread. CPU time is Python work; the rest of the wall time was
+    spent waiting, mostly on yt-dlp/ffmpeg child processes. Each outermost
+    section per thread also runs under cProfile when one is free (Python
+    3.12+ allows a single active cProfile per process), and tracemalloc tracks
+    allocations for the whole run. A report is written at exit.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.sections = {}
+        self.stats = None
+        self.report_dir = None
+        self.started = None
+        self.baseline = None
+
+    def enable(self, report_dir, trace_frames=10):
+        if self.enabled:
+            return
+        os.makedirs(report_dir, exist_ok=True)
+        self.report_dir = report_dir
+        self.started = time.perf_counter()
+        tracemalloc.start(trace_frames)
+        self.baseline = tracemalloc.take_snapshot()
+        self.enabled = True
+        atexit.register(self.write_report)
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        # cProfile cannot nest within a thread, and from Python 3.12 on only
+        # one can be active per process: sections that can't get one are only timed
+        prof = None
+        if not getattr(self.local, 'active', False):
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+            except ValueError:
+                prof = None
+            else:
+                self.local.active = True
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            if prof:
+                prof.disable()
+                self.local.active = False
+            with self.lock:
+                entry = self.sections.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'max': 0.0})
+                entry['calls'] += 1
+                entry['wall'] += wall
+                entry['cpu'] += cpu
+                entry['max'] = max(entry['max'], wall)
+                if prof:
+                    if self.stats is None:
+                        self.stats = pstats.Stats(prof)
+                    else:
+                        self.stats.add(prof)
+
+    def write_report(self):
+        """Write report.txt (and profile.pstats) into the report folder. Returns the report path."""
+        if not self.enabled:
+            return None
+        out = io.StringIO()
+        total = time.perf_counter() - self.started
+        out.write(f"Yutub profile - pid {os.getpid()} - {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        out.write(f"Run wall time: {total:.3f}s\n\n")
+
+        out.write("Sections (inclusive times; waiting = wall - python cpu, i.e. child processes and I/O)\n")
+        out.write(f"{'section':<32}{'calls':>7}{'wall s':>11}{'python s':>11}{'waiting s':>11}{'max s':>9}\n")
+        with self.lock:
+            sections = sorted(self.sections.items(), key=lambda kv: -kv[1]['wall'])
+            stats = self.stats
+            for name, e in sections:
+                out.write(f"{name:<32}{e['calls']:>7}{e['wall']:>11.3f}{e['cpu']:>11.3f}"
+                          f"{max(0.0, e['wall'] - e['cpu']):>11.3f}{e['max']:>9.3f}\n")
+
+            if stats is not None:
+                stats.dump_stats(os.path.join(self.report_dir, "profile.pstats"))
+                for order, limit in (("cumulative", 30), ("tottime", 20)):
+                    out.write(f"\nTop functions by {order} time\n")
+                    stats.stream = out
+                    stats.sort_stats(order).print_stats(limit)
+
+        out.write("\nAllocation hotspots (growth since start)\n")
+        # Leave out the profiler's own bookkeeping
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, module.__file__) for module in (tracemalloc, cProfile, pstats)
+        ] + [
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        for stat in snapshot.compare_to(self.baseline, "lineno")[:20]:
+            out.write(f"  {stat}\n")
+        current, peak = tracemalloc.get_traced_memory()
+        out.write(f"\nTraced memory: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+
+        path = os.path.join(self.report_dir, "report.txt")
+        with open(path, "w") as fh:
+            fh.write(out.getvalue())
+        print(f"Profile report written to {path}", file=sys.stderr)
+        return path
+
+_profiler = Profiler()
+
+def enable(report_dir=None):
+    """Turn profiling on for this run. Reports go to data/profiles/<time>-<pid> by default."""
+    if report_dir is None:
+        from .utils import get_data_dir
+        report_dir = os.path.join(get_data_dir(), "profiles", f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    _profiler.enable(report_dir)
+
+def is_enabled():
+    return _profiler.enabled
+
+def section(name):
+    """Context manager timing/profiling a block when profiling is on (no-op otherwise)."""
+    return _profiler.section(name)
+
+def profiled(name):
+    """Decorator version of section()."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _profiler.enabled:
+                return func(*args, **kwargs)
+            with _profiler.section(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def write_report():
+    return _profiler.write_report()
@@ -0,0 +1,128 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Staging of in-progress downloads and publishing into the library folder
+
+import errno
+import hashlib
+import os
+import shutil
+from .verify import HashingWriter
+
+# yt-dlp leftovers that never belong in the library
+PARTIAL_SUFFIXES = ('.part', '.ytdl', '.temp', '.tmp')
+
+def job_scratch_dir(scratch_root, *job_key):
+    """
+    Scratch folder for one job. The name is derived from the job parameters so
+    a retried or resumed job finds its own .part files again.
+    """
+    digest = hashlib.sha1("|".join(str(k) for k in job_key).encode()).hexdigest()[:16]
+    path = os.path.join(scratch_root, f"job-{digest}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def is_partial(name):
+    return name.endswith(PARTIAL_SUFFIXES) or '.part-Frag' in name
+
+def finished_files(job_dir):
+    """
+    Relative paths of the completed files inside a job folder. Only call it
+    after yt-dlp exited with code 0: by then it has merged and deleted the
+    separate streams ('title.f137.mp4'), so any such name left is a real
+    file (a title ending in '.f1', say), not an unmerged stream.
+    """
+    found = []
+    for root, _dirs, files in os.walk(job_dir):
+        for name in files:
+            if not is_partial(name):
+                found.append(os.path.relpath(os.path.join(root, name), job_dir))
+    return sorted(found)
+
+def _candidate_names(path):
+    base, ext = os.path.splitext(path)
+    yield path
+    for i in range(1, 1000):
+        yield f"{base} ({i}){ext}"
+
+def same_volume(src, dest_dir):
+    """True if files from 'src' are published into 'dest_dir' by a rename rather than a copy."""
+    os.makedirs(dest_dir, exist_ok=True)
+    return os.stat(src).st_dev == os.stat(dest_dir).st_dev
+
+def _copy_hashed(src, dest, chunk_size=1024 * 1024):
+    """Copy a file, returning the sha256 of the data copied."""
+    with open(src, "rb") as src_fh, open(dest, "wb") as dest_fh:
+        writer = HashingWriter(dest_fh)
+        for chunk in iter(lambda: src_fh.read(chunk_size), b""):
+            writer.write(chunk)
+        dest_fh.flush()
+        os.fsync(dest_fh.fileno())
+    return writer.hexdigest()
+
+def publish_file(src, dest, hashes=None):
+    """
+    Move a finished file to 'dest' without ever overwriting an existing file
+    and without a half written file being visible under the final name.
+    Returns the path actually used ('name (1).ext' etc. on collisions).
+    When the file has to be copied (another volume) and 'hashes' is a dict,
+    the sha256 computed during the copy is stored under the returned path.
+    """
+    dest_dir = os.path.dirname(dest)
+    os.makedirs(dest_dir, exist_ok=True)
+
+    staged = src
+    digest = None
+    if os.stat(src).st_dev != os.stat(dest_dir).st_dev:
+        # Different volume: copy next to the destination first, then link into place
+        staged = os.path.join(dest_dir, f".{os.path.basename(dest)}.yutub-{os.getpid()}")
+        digest = _copy_hashed(src, staged)
+
+    for candidate in _candidate_names(dest):
+        try:
+            # link() fails instead of overwriting, making the name claim atomic
+            os.link(staged, candidate)
+            os.unlink(staged)
+        except FileExistsError:
+            continue
+        except OSError as e:
+            if e.errno not in (errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EXDEV):
+                raise
+            # Filesystems without hard links: reserve the name, then rename over it
+            try:
+                fd = os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            os.close(fd)
+            os.replace(staged, candidate)
+        if staged != src:
+            os.unlink(src)
+        if hashes is not None and digest is not None:
+            hashes[candidate] = digest
+        return candidate
+
+    raise FileExistsError(f"No free file name for {dest}")
+
+def publish_job(job_dir, output_dir, hashes=None):
+    """Publish every finished file of a job and remove its scratch folder. See publish_file() for 'hashes'."""
+    published = []
+    for rel_path in finished_files(job_dir):
+        published.append(publish_file(os.path.join(job_dir, rel_path), os.path.join(output_dir, rel_path), hashes))
+    shutil.rmtree(job_dir, ignore_errors=True)
+    return published
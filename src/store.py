@@ -0,0 +1,297 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Output folder managed as a cache: byte quota, access tracking and eviction
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from .formats import parse_size
+
+INDEX_NAME = ".yutub-store.sqlite3"
+
+POLICY_LRU = "lru"
+POLICY_SIZE = "size"
+
+# Reservations of downloads that died without releasing them expire
+RESERVATION_TTL = 6 * 3600
+# Seconds between background access refreshes and quota checks
+MAINTENANCE_INTERVAL = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    added REAL NOT NULL,
+    last_access REAL NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bytes INTEGER NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+_maintained = set()
+_maintained_lock = threading.Lock()
+
+class DownloadStore:
+    """
+    Index (SQLite file inside the folder) of the files in an output folder,
+    so quota checks are a SUM instead of a directory walk. Downloads reserve
+    their expected size first; whatever doesn't fit the quota (or the free
+    disk space) is evicted before the download starts, least recently used
+    first or, with the 'size' policy, by size times idle time. Pinned files
+    are never evicted. Each connection is used by a single thread.
+    """
+    def __init__(self, root, quota, policy=POLICY_LRU, min_free=0):
+        self.root = os.path.abspath(root)
+        self.quota = quota
+        self.policy = policy
+        self.min_free = min_free
+        os.makedirs(self.root, exist_ok=True)
+        # Rollback journal (not WAL), like the job queue: the folder may be on network storage
+        self.conn = sqlite3.connect(os.path.join(self.root, INDEX_NAME), timeout=60, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        if self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0:
+            # New index (or empty folder): take stock of what is already there
+            self.scan()
+
+    def close(self):
+        self.conn.close()
+
+    def _begin(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def _rel(self, path):
+        # Paths as listed by 'store status --list' are relative to the folder
+        if not os.path.isabs(path) and not os.path.exists(path):
+            path = os.path.join(self.root, path)
+        return os.path.relpath(os.path.abspath(path), self.root)
+
+    def _is_own(self, rel_path):
+        # The index itself and files being published (".name.yutub-<pid>")
+        name = os.path.basename(rel_path)
+        return name.startswith(INDEX_NAME) or (name.startswith(".") and ".yutub-" in name)
+
+    def scan(self):
+        """Rebuild the index from a full walk of the folder. Returns the number of files."""
+        found = {}
+        for root, _dirs, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(root, name)
+                rel = self._rel(path)
+                if self._is_own(rel):
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found[rel] = st
+        now = time.time()
+        self._begin()
+        try:
+            known = {r['path'] for r in self.conn.execute("SELECT path FROM items")}
+            for rel in known - set(found):
+                self.conn.execute("DELETE FROM items WHERE path=?", (rel,))
+            for rel, st in found.items():
+                self.conn.execute(
+                    "INSERT INTO items (path, size, added, last_access) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET size=excluded.size",
+                    (rel, st.st_size, now, max(st.st_atime, st.st_mtime)))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return len(found)
+
+    def add(self, paths):
+        """Record newly published files."""
+        now = time.time()
+        self._begin()
+        try:
+            for path in paths:
+                self.conn.execute(
+                    "INSERT INTO items (path, size, added, last_access) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET size=excluded.size, last_access=excluded.last_access",
+                    (self._rel(path), os.path.getsize(path), now, now))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def pin(self, path, pinned=True):
+        """Exclude a file from eviction (or allow it again). Returns False if it isn't in the index."""
+        cur = self.conn.execute("UPDATE items SET pinned=? WHERE path=?", (1 if pinned else 0, self._rel(path)))
+        return cur.rowcount == 1
+
+    def refresh_access(self):
+        """
+        Pick up reads by other programs (file access times, where the mount
+        records them) and forget files deleted behind our back.
+        """
+        rows = self.conn.execute("SELECT path, last_access FROM items").fetchall()
+        for row in rows:
+            try:
+                atime = os.stat(os.path.join(self.root, row['path'])).st_atime
+            except FileNotFoundError:
+                self.conn.execute("DELETE FROM items WHERE path=?", (row['path'],))
+                continue
+            except OSError:
+                continue
+            if atime > row['last_access']:
+                self.conn.execute("UPDATE items SET last_access=? WHERE path=?", (atime, row['path']))
+
+    def _used(self, now):
+        used = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM items").fetchone()[0]
+        reserved = self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM reservations WHERE expires>?",
+                                     (now,)).fetchone()[0]
+        return used, reserved
+
+    def _victims(self, now):
+        if self.policy == POLICY_SIZE:
+            return self.conn.execute("SELECT path, size FROM items WHERE pinned=0 "
+                                     "ORDER BY size * (? - last_access) DESC", (now,))
+        return self.conn.execute("SELECT path, size FROM items WHERE pinned=0 ORDER BY last_access")
+
+    def _evict(self, needed, now):
+        """Delete unpinned files until 'needed' bytes are freed. Call inside a transaction."""
+        evicted = []
+        freed = 0
+        for row in self._victims(now).fetchall():
+            if freed >= needed:
+                break
+            path = os.path.join(self.root, row['path'])
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.conn.execute("DELETE FROM items WHERE path=?", (row['path'],))
+            freed += row['size']
+            evicted.append(row['path'])
+            # Drop folders emptied by the eviction (templates with subfolders)
+            parent = os.path.dirname(path)
+            while parent != self.root and parent.startswith(self.root):
+                try:
+                    os.rmdir(parent)
+                except OSError:
+                    break
+                parent = os.path.dirname(parent)
+        return evicted, freed
+
+    def reserve(self, nbytes):
+        """
+        Make room for a download of about nbytes (evicting as needed) and hold
+        it until release(). Returns the reservation id. Raises RuntimeError if
+        pinned files alone leave no room.
+        """
+        now = time.time()
+        self._begin()
+        try:
+            self.conn.execute("DELETE FROM reservations WHERE expires<=?", (now,))
+            used, reserved = self._used(now)
+            needed = used + reserved + nbytes - self.quota
+            # Bytes other downloads reserved are not on disk yet but will be
+            free = shutil.disk_usage(self.root).free - reserved
+            needed = max(needed, nbytes + self.min_free - free)
+            if needed > 0:
+                evictable = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM items WHERE pinned=0").fetchone()[0]
+                if evictable < needed:
+                    # Fail before deleting anything
+                    raise RuntimeError(f"Store full: {needed - evictable} more bytes needed than can be evicted "
+                                       f"from {self.root} (pinned files are kept)")
+                self._evict(needed, now)
+            cur = self.conn.execute("INSERT INTO reservations (bytes, expires) VALUES (?, ?)",
+                                    (nbytes, now + RESERVATION_TTL))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return cur.lastrowid
+
+    def release(self, reservation_id):
+        self.conn.execute("DELETE FROM reservations WHERE id=?", (reservation_id,))
+
+    def enforce(self):
+        """Evict down to the quota (downloads larger than estimated, files added by hand). Returns evicted paths."""
+        now = time.time()
+        self._begin()
+        try:
+            used, reserved = self._used(now)
+            evicted = []
+            if used + reserved > self.quota:
+                evicted, _freed = self._evict(used + reserved - self.quota, now)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return evicted
+
+    def status(self):
+        now = time.time()
+        used, reserved = self._used(now)
+        row = self.conn.execute("SELECT COUNT(*) AS n, COALESCE(SUM(CASE WHEN pinned THEN size END), 0) AS pinned "
+                                "FROM items").fetchone()
+        return {'files': row['n'], 'used': used, 'pinned': row['pinned'], 'reserved': reserved, 'quota': self.quota}
+
+    def items(self):
+        """Indexed files, next to be evicted first (pinned ones last)."""
+        now = time.time()
+        if self.policy == POLICY_SIZE:
+            order = "pinned, size * (? - last_access) DESC"
+            params = (now,)
+        else:
+            order = "pinned, last_access"
+            params = ()
+        return [dict(r) for r in self.conn.execute(f"SELECT * FROM items ORDER BY {order}", params)]
+
+def _maintain(root, config, interval):
+    store = DownloadStore(root, parse_size(config['store_quota']), config['store_policy'],
+                          parse_size(config['store_min_free']))
+    try:
+        while True:
+            time.sleep(interval)
+            try:
+                store.refresh_access()
+                store.enforce()
+            except sqlite3.Error:
+                continue
+    finally:
+        store.close()
+
+def open_store(root, config, background=True):
+    """
+    DownloadStore for an output folder, or None when no 'store_quota' is
+    configured. The first call per folder also starts a background thread
+    that keeps the index and the quota in check. The caller closes the store.
+    """
+    if not config.get('store_quota'):
+        return None
+    store = DownloadStore(root, parse_size(config['store_quota']), config['store_policy'],
+                          parse_size(config['store_min_free']))
+    if background:
+        with _maintained_lock:
+            if store.root not in _maintained:
+                _maintained.add(store.root)
+                threading.Thread(target=_maintain, args=(store.root, config, MAINTENANCE_INTERVAL), daemon=True).start()
+    return store
@@ -0,0 +1,216 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Channel and playlist subscriptions with incremental sync
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+from .utils import get_data_dir, yt_dlp_base_cmd, yt_dlp_env, release_egress
+from .governor import get_governor
+from .egress import get_egress_pool
+from .probing import classify_error, ERR_RATE_LIMITED
+from .jobs import make_prefs, run_job
+
+# Recent entry IDs remembered per channel; listing stops at the first of them.
+# Playlists remember every listed ID instead (their order says nothing about age)
+SEEN_LIMIT = 200
+# Failed entries are retried on later syncs up to this many times
+MAX_ATTEMPTS = 3
+
+def subscriptions_dir():
+    path = os.path.join(get_data_dir(), "subscriptions")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def normalize_source_url(url):
+    """Channel home pages list tabs, not videos: point them at the uploads tab."""
+    url = url.strip().rstrip("/")
+    if re.search(r"youtube\.com/(@[^/?]+|channel/[^/?]+|c/[^/?]+|user/[^/?]+)$", url):
+        url += "/videos"
+    return url
+
+def is_newest_first(url):
+    """Channel upload tabs list newest first; playlists usually append new entries at the end."""
+    return bool(re.search(r"youtube\.com/(@[^/?]+|channel/[^/?]+|c/[^/?]+|user/[^/?]+)/(videos|shorts|streams)$",
+                          normalize_source_url(url)))
+
+def source_key(url):
+    return hashlib.sha1(normalize_source_url(url).encode()).hexdigest()[:12]
+
+def save_subscription(sub):
+    """Write one source's state atomically (temp file + fsync + rename)."""
+    path = os.path.join(subscriptions_dir(), f"{sub['key']}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(sub, fh, indent=2)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+def load_subscriptions():
+    subs = []
+    folder = subscriptions_dir()
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(folder, name)) as fh:
+                subs.append(json.load(fh))
+        except (ValueError, OSError):
+            continue
+    return subs
+
+def remove_subscription(key):
+    path = os.path.join(subscriptions_dir(), f"{key}.json")
+    if os.path.exists(path):
+        os.remove(path)
+
+def list_entries(url, stop_at=None, limit=None, debug=False):
+    """
+    List a source in its own order. With 'stop_at' (IDs) the listing is lazy
+    and stops at the first of them, so only the new part of a newest first
+    channel is fetched. Returns [{'id', 'url', 'title'}, ...].
+    """
+    member = get_egress_pool().acquire()
+    cmd = yt_dlp_base_cmd() + member.args + ["--flat-playlist", "--print", "%(id)s\t%(url)s\t%(title)s"]
+    if stop_at is not None:
+        cmd.append("--lazy-playlist")
+    if limit:
+        cmd += ["--playlist-end", str(limit)]
+    cmd.append(normalize_source_url(url))
+
+    entries = []
+    reached_known = False
+    governor = get_governor(member.name)
+    started = governor.acquire()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=yt_dlp_env())
+    try:
+        for line in process.stdout:
+            parts = line.rstrip("\n").split("\t")
+            if not parts[0]:
+                continue
+            entry_id = parts[0]
+            if stop_at is not None and entry_id in stop_at:
+                if debug: print(f"Reached known entry {entry_id}, stopping listing")
+                reached_known = True
+                break
+            entry_url = parts[1] if len(parts) > 1 and parts[1] not in ("", "NA") else f"https://www.youtube.com/watch?v={entry_id}"
+            entries.append({'id': entry_id, 'url': entry_url, 'title': parts[2] if len(parts) > 2 else entry_id})
+    finally:
+        if process.poll() is None:
+            process.terminate()
+        _out, err = process.communicate()
+    error_type = classify_error(err) if process.returncode not in (0, -15) else None
+    governor.report(started, error_type == ERR_RATE_LIMITED)
+    release_egress(member, error_type)
+
+    if process.returncode != 0 and not reached_known:
+        # Cut short: a full listing would make the missing entries look removed, and a lazy
+        # one saved as seen would hide the entries between it and the last known one
+        raise RuntimeError(f"Listing {url} failed: {err.strip()[-500:]}")
+    return entries
+
+def list_new_entries(url, known_ids, debug=False):
+    """
+    Entries of a source that aren't in 'known_ids', oldest first, plus the IDs
+    to remember as seen. Channels stop listing at the first known entry;
+    playlists are listed in full and diffed, since new entries may be anywhere
+    (usually at the end).
+    """
+    if is_newest_first(url):
+        new_entries = list(reversed(list_entries(url, stop_at=known_ids, debug=debug)))
+        return new_entries, None
+    listed = list_entries(url, debug=debug)
+    return [e for e in listed if e['id'] not in known_ids], [e['id'] for e in listed]
+
+def add_subscription(url, prefs=None, name=None, backfill=0, debug=False):
+    """
+    Subscribe to a channel or playlist. What it lists now is recorded as seen
+    (for a channel its SEEN_LIMIT newest entries, so one of them being deleted
+    doesn't make the next sync queue the whole channel), except that
+    backfill > 0 queues that many of the latest entries (the last ones of a
+    playlist).
+    """
+    url = normalize_source_url(url)
+    if is_newest_first(url):
+        listed = list_entries(url, limit=max(backfill, SEEN_LIMIT), debug=debug)
+        backlog = list(reversed(listed[:backfill]))
+    else:
+        listed = list_entries(url, debug=debug)
+        backlog = listed[-backfill:] if backfill else []
+    sub = {
+        'key': source_key(url),
+        'url': url,
+        'name': name or url,
+        'prefs': prefs or make_prefs(),
+        'seen': [e['id'] for e in listed][:SEEN_LIMIT] if is_newest_first(url) else [e['id'] for e in listed],
+        'pending': backlog,
+        'failed': [],
+        'last_sync': time.time(),
+    }
+    save_subscription(sub)
+    return sub
+
+def sync_subscription(sub, progress_callback=None, debug=False, download=True, **download_kwargs):
+    """
+    Fetch entries not seen before and download them oldest first.
+    State is saved after listing and after every entry, so an interrupted sync
+    continues with the remaining pending entries. Returns (downloaded, failed).
+    """
+    def report(msg):
+        if progress_callback: progress_callback(msg)
+
+    # 1. List only what is new (pending entries from an interrupted run count as known)
+    known = set(sub['seen']) | {e['id'] for e in sub['pending']}
+    report(f"Listing {sub['name']}...")
+    new_entries, listed_ids = list_new_entries(sub['url'], known, debug=debug)
+    sub['pending'].extend(new_entries)
+    if listed_ids is None:
+        sub['seen'] = ([e['id'] for e in reversed(new_entries)] + sub['seen'])[:SEEN_LIMIT]
+    else:
+        sub['seen'] = listed_ids
+    sub['last_sync'] = time.time()
+    save_subscription(sub)
+
+    if not download:
+        return 0, 0
+
+    # 2. Work through the pending entries
+    downloaded = failed = 0
+    for entry in list(sub['pending']):
+        report(f"{sub['name']}: {entry['title']}")
+        success, msg = run_job(entry['url'], sub['prefs'],
+                               lambda p: report(f"{entry['title']}: {p}"), debug=debug, **download_kwargs)
+        sub['pending'].remove(entry)
+        if success:
+            downloaded += 1
+        else:
+            failed += 1
+            entry['attempts'] = entry.get('attempts', 0) + 1
+            entry['error'] = msg[-300:]
+            if entry['attempts'] < MAX_ATTEMPTS:
+                sub['pending'].append(entry)
+            else:
+                sub['failed'].append(entry)
+        save_subscription(sub)
+    return downloaded, failed
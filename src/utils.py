@@ -25,6 +25,74 @@ import urllib.request
 import stat
 import threading
 import sys
+import json
+import time
+from .formats import normalize_formats, build_display_lists, estimate_size
+from .config import load_config
+from .storage import job_scratch_dir, publish_job, finished_files, same_volume
+from .probing import classify_error, LatencyTracker, RETRYABLE_ERRORS, ERR_UNKNOWN, ERR_RATE_LIMITED, ERR_NETWORK
+from .governor import get_governor
+from .egress import get_egress_pool, DIRECT
+from .profiling import profiled, section
+from .infocache import save_info, usable_info
+from .convert import conversion_args
+from .store import open_store
+from .verify import verify_files, describe_check, hash_file, HashingWriter, BAD_STATUSES
+
+_latency_tracker = None
+
+def get_data_dir():
+    """Folder for Yutub's own state files (created on demand)."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_path = os.path.join(project_root, "data")
+    os.makedirs(data_path, exist_ok=True)
+    return data_path
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+def yt_dlp_base_cmd():
+    """LOCAL yt-dlp executable plus the options shared by every invocation."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return [os.path.join(project_root, "lib", "yt-dlp"), "--js-runtimes", "node", "--no-warnings",
+            "--user-agent", USER_AGENT, "--no-check-certificates"]
+
+def yt_dlp_env():
+    """Environment with the local lib folder on PYTHONPATH (secretstorage)."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = os.environ.copy()
+    lib_path = os.path.join(project_root, "lib")
+    if os.path.exists(lib_path):
+        current_pythonpath = env.get("PYTHONPATH", "")
+        env["PYTHONPATH"] = f"{lib_path}{os.pathsep}{current_pythonpath}"
+    return env
+
+def run_yt_dlp(cmd, timeout=None, env=None, debug=False, egress=DIRECT):
+    """
+    subprocess.run for a yt-dlp request, paced by the rate governor of its egress.
+    Rate limited responses wait for the common backoff and are retried.
+    """
+    governor = get_governor(egress)
+    for attempt in range(governor.retries + 1):
+        started = governor.acquire()
+        res = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, env=env or yt_dlp_env())
+        throttled = res.returncode != 0 and classify_error(res.stderr) == ERR_RATE_LIMITED
+        governor.report(started, throttled)
+        if not throttled:
+            break
+        if debug: print(f"Rate limited (attempt {attempt + 1}), next request in {governor.wait_time():.0f}s")
+    return res
+
+def release_egress(member, error_type=None, nbytes=0, seconds=0.0):
+    """Report a job outcome to the egress pool. Only network errors and throttling count against the egress."""
+    get_egress_pool().release(member, ok=error_type != ERR_NETWORK, throttled=error_type == ERR_RATE_LIMITED,
+                              nbytes=nbytes, seconds=seconds)
+
+def get_latency_tracker():
+    """Process wide latency history used to size probe timeouts."""
+    global _latency_tracker
+    if _latency_tracker is None:
+        _latency_tracker = LatencyTracker(os.path.join(get_data_dir(), "latency.json"))
+    return _latency_tracker
 
 def ensure_yt_dlp(progress_callback=None, debug=False):
     """Ensure yt-dlp executable exists in the lib folder. Download if missing."""
@@ -115,24 +183,35 @@ def get_default_browser():
     # Fallback to firefox as requested in previous iterations if detection fails
     return 'firefox'
 
+@profiled("explore.get_video_info")
 def get_video_info(url, debug=False):
     """
     Fetch video metadata and formats using the LOCAL yt-dlp executable.
     Dynamically identifies the correct browser/cookie strategy and returns it.
+    All requests go out through one member of the egress pool; network
+    errors and throttling are retried through the other members.
     """
+    pool = get_egress_pool()
+    tried = set()
+    while True:
+        member = pool.acquire(exclude=tried)
+        info = _fetch_video_info(url, member, debug)
+        release_egress(member, info.get('error_type'))
+        tried.add(member.name)
+        if info.get('error_type') not in (ERR_NETWORK, ERR_RATE_LIMITED) or len(tried) >= len(pool.members):
+            return info
+        if debug: print(f"Explore through {member.name} failed ({info['error_type']}), trying another egress")
+
+def _fetch_video_info(url, member, debug=False):
     try:
         ensure_yt_dlp(debug=debug)
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         cookies_file = os.path.join(project_root, "cookies.txt")
         browser = get_default_browser()
         
-        # Common User-Agent to mimic a real browser
-        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        
         # Helper to construct args
         def build_full_cmd(base_cmd, c_path=None, b_name=None):
-            cmd = list(base_cmd)
-            cmd.extend(["--user-agent", user_agent, "--no-check-certificates"])
+            cmd = list(base_cmd) + member.args
             auth = []
             if c_path and os.path.exists(c_path):
                 auth = ["--cookies", c_path]
@@ -141,9 +220,7 @@ def get_video_info(url, debug=False):
             return cmd + auth, auth
 
         # 1. Identify working auth strategy using Title check
-        # Update path to use lib/yt-dlp
-        yt_cmd = os.path.join(project_root, "lib", "yt-dlp")
-        title_base = [yt_cmd, "--js-runtimes", "node", "--get-title", "--no-warnings"]
+        title_base = yt_dlp_base_cmd() + ["--get-title"]
         
         working_auth_args = []
         title = None
@@ -159,175 +236,188 @@ def get_video_info(url, debug=False):
                 if b != browser: strategies.append((None, b))
         strategies.append((None, None))                   # no cookies (last resort)
         
-        # Prepare environment with PYTHONPATH for custom libs (secretstorage)
-        env = os.environ.copy()
-        lib_path = os.path.join(project_root, "lib")
-        if os.path.exists(lib_path):
-            current_pythonpath = env.get("PYTHONPATH", "")
-            env["PYTHONPATH"] = f"{lib_path}{os.pathsep}{current_pythonpath}"
+        # Environment with PYTHONPATH for custom libs (secretstorage)
+        env = yt_dlp_env()
 
         # Execute strategies
+        tracker = get_latency_tracker()
+        last_error = None
+        last_error_type = ERR_UNKNOWN
         for c_path, b_name in strategies:
+            # Timeout derived from how long successful probes usually take
+            timeout = tracker.timeout()
             try:
                 full_cmd, auth_args = build_full_cmd(title_base, c_path, b_name)
                 full_cmd.append(url) # Add URL to the command
                 # We use subprocess.run to catch errors easily
-                # timeout increased to 90s
-                res = subprocess.run(full_cmd, capture_output=True, text=True, timeout=90, env=env)
+                started = time.monotonic()
+                res = run_yt_dlp(full_cmd, timeout=timeout, env=env, debug=debug, egress=member.name)
                 
                 if res.returncode == 0 and res.stdout.strip():
+                    tracker.record(time.monotonic() - started)
                     title = res.stdout.strip()
                     working_auth_args = auth_args
                     if debug: print(f"Strategy worked: cookies={c_path}, browser={b_name}")
                     break
                 else:
                     # Collect error for debugging if all fail
-                    err_msg = res.stderr.strip() if res.stderr else "Unknown error"
-                    if debug: print(f"Strategy failed (c={c_path}, b={b_name}): rc={res.returncode}, err={err_msg[:200]}...")
+                    last_error = res.stderr.strip() if res.stderr else "Unknown error"
+                    last_error_type = classify_error(last_error)
+                    if debug: print(f"Strategy failed (c={c_path}, b={b_name}): rc={res.returncode}, type={last_error_type}, err={last_error[:200]}...")
 
             except subprocess.TimeoutExpired:
-                if debug: print(f"Strategy timed out: c={c_path}, b={b_name}")
+                # A hanging keyring/cookie read is strategy specific, keep probing
+                last_error = f"Timed out after {timeout:.0f}s"
+                last_error_type = ERR_UNKNOWN
+                if debug: print(f"Strategy timed out after {timeout:.0f}s: c={c_path}, b={b_name}")
+                continue
             except Exception as e:
                 # strategy failed, try next
                 if debug: print(f"Strategy exception (c={c_path}, b={b_name}): {str(e)}")
                 continue
 
+            # Other cookies won't fix an outage, a removed video or a geo-block
+            if last_error_type not in RETRYABLE_ERRORS:
+                if debug: print(f"Aborting strategy probing on {last_error_type} error")
+                break
+
         if not title:
-            # Re-construct a helpful error message from the last failure but generally
-            # imply that no valid auth method was found.
-            return {'error': "Could not fetch video info. All authentication strategies failed.\n- Check your internet connection.\n- Ensure you are logged in to YouTube in your browser.\n- If using Linux, try 'pip install secretstorage'."}
+            if last_error_type in RETRYABLE_ERRORS:
+                # Generally imply that no valid auth method was found.
+                message = "Could not fetch video info. All authentication strategies failed.\n- Check your internet connection.\n- Ensure you are logged in to YouTube in your browser.\n- If using Linux, try 'pip install secretstorage'."
+            else:
+                message = f"Could not fetch video info ({last_error_type} error)."
+            if last_error:
+                message += f"\n\n{last_error[-1000:]}"
+            return {'error': message, 'error_type': last_error_type}
 
         # 2. Get Formats using the SUCCESSFUL strategy
-        format_base = [yt_cmd, "--js-runtimes", "node", "-F", "--no-warnings"]
+        # The info JSON carries codecs, bitrates and sizes for every format,
+        # including the video only streams the -F table made hard to use.
         # Basic args + working auth
-        final_format_cmd = list(format_base)
-        final_format_cmd.extend(["--user-agent", user_agent, "--no-check-certificates"])
+        final_format_cmd = yt_dlp_base_cmd() + ["-J"] + member.args
         final_format_cmd.extend(working_auth_args)
         final_format_cmd.append(url) # append URL at the end
         
-        try:
-             output = subprocess.check_output(final_format_cmd, stderr=subprocess.STDOUT, env=env).decode()
-        except subprocess.CalledProcessError as e:
-             return {'error': f"Failed to fetch formats: {e.output.decode() if e.output else str(e)}"}
-        
+        res = run_yt_dlp(final_format_cmd, env=env, debug=debug, egress=member.name)
+        if res.returncode != 0:
+             err_msg = res.stderr.strip() or f"yt-dlp exited with code {res.returncode}"
+             return {'error': f"Failed to fetch formats: {err_msg}", 'error_type': classify_error(err_msg)}
         # 3. Parse formats
-        video_formats = []
-        audio_formats = []
-        
-        lines = output.splitlines()
-        parsing = False
-        for line in lines:
-            if line.startswith('ID') or '---' in line:
-                if '---' in line: parsing = True
-                continue
-            
-            if not parsing:
-                continue
-                
-            parts = line.split()
-            if len(parts) < 3:
-                continue
-                
-            f_id = parts[0]
-            extension = parts[1]
-            
-            # Identify audio only formats
-            is_audio = 'audio only' in line or (parts[2] == 'audio' and parts[3] == 'only')
-            
-            # Extract size
-            size_match = re.search(r'(\d+\.?\d*)\s*([mMgG][iI]?[bB])', line)
-            filesize = size_match.group(0) if size_match else "Unknown"
-            
-            if is_audio:
-                # Extract all 'k' values (like 129k, 44k, etc)
-                k_values = re.findall(r'(\d+)k', line)
-                hz_match = re.search(r'(\d+)Hz', line)
-                
-                # Default values
-                abr = "N/A"
-                asr = "N/A"
-                
-                if hz_match:
-                    # Case 1: Sampling rate is in Hz (e.g. 44100Hz)
-                    try:
-                        khz = int(hz_match.group(1)) // 1000
-                        asr = f"{khz}k"
-                    except:
-                        asr = hz_match.group(0)
-                        
-                    # If we have Hz, then the last 'k' value is usually ABR
-                    if k_values:
-                        abr = f"{k_values[-1]}k"
-                elif len(k_values) >= 2:
-                    # Case 2: Both ABR and ASR are in 'k' format (e.g. 129k 44k)
-                    # For audio only, the last two are usually ABR and ASR
-                    asr = f"{k_values[-1]}k"
-                    abr = f"{k_values[-2]}k"
-                elif k_values:
-                    # Fallback
-                    abr = f"{k_values[0]}k"
-                
-                quality = f"{abr} - {asr}"
-                
-                entry = {
-                    'format_id': f_id,
-                    'ext': extension,
-                    'quality': quality or "N/A",
-                    'size': filesize
-                }
-                audio_formats.append(entry)
-            else:
-                # Filter video by extension and exclude "video only"
-                if extension.lower() not in ['mp4', 'webm'] or 'video only' in line:
-                    continue
-                
-                # Extract resolution
-                res_match = re.search(r'(\d+x\d+)|(\d+p)', line)
-                resolution = res_match.group(0) if res_match else parts[2]
-                
-                entry = {
-                    'format_id': f_id,
-                    'ext': extension,
-                    'res': resolution,
-                    'size': filesize
-                }
-                video_formats.append(entry)
-                
+        with section("explore.parse_formats"):
+            info = json.loads(res.stdout)
+            duration = info.get('duration')
+            formats = normalize_formats(info.get('formats'), duration)
+            video_formats, audio_formats = build_display_lists(formats)
+        # Kept so the download can start from it instead of extracting again
+        try:
+            info_json = save_info(url, res.stdout, info)
+            # Stream URLs are signed for the IP that extracted them
+            info_json['egress'] = member.name
+        except OSError as e:
+            if debug: print(f"Could not keep info JSON: {e}")
+            info_json = None
+
         return {
             'title': title,
             'video': video_formats,
             'audio': audio_formats,
-            'auth_args': working_auth_args
+            'formats': formats,
+            'duration': duration,
+            'chapters': [{'title': c.get('title') or "", 'start': c.get('start_time') or 0, 'end': c.get('end_time')}
+                         for c in info.get('chapters') or []],
+            'auth_args': working_auth_args,
+            'info_json': info_json
         }
         
     except Exception as e:
         if debug: print(f"get_video_info exception: {e}")
-        return {'error': str(e)}
+        return {'error': str(e), 'error_type': ERR_UNKNOWN}
+
+def parse_timestamp(value):
+    """'90', '1:30' or '1:02:03.5' -> seconds."""
+    parts = value.strip().split(":")
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"Invalid time: {value}")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
 
-def download_format(url, format_id, progress_callback=None, conv_mode=None, auth_args=None, debug=False):
+def format_timestamp(seconds):
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+def time_range_section(value):
+    """'1:00-2:30' -> '*60-150' for --download-sections. An open end ('1:00-') runs to the end."""
+    start, sep, end = value.partition("-")
+    if not sep:
+        raise ValueError(f"Invalid time range: {value}")
+    start_s = parse_timestamp(start) if start.strip() else 0.0
+    end_s = parse_timestamp(end) if end.strip() else None
+    if end_s is not None and end_s <= start_s:
+        raise ValueError(f"Invalid time range: {value}")
+    return f"*{start_s:g}-{'inf' if end_s is None else f'{end_s:g}'}"
+
+def download_format(url, format_id, progress_callback=None, conv_mode=None, auth_args=None, debug=False,
+                    output_dir=None, scratch_dir=None, template=None, sections=None, accurate_cuts=False,
+                    info_json=None, cancel_event=None):
     """
     Download a specific format using the LOCAL yt-dlp executable.
-    Saves to the 'downloads' folder.
+    Works in a per-job scratch folder and moves the finished files into
+    output_dir (config 'output_dir', 'downloads' by default).
+    'sections' limits the download to time ranges ('*60-150') or chapter
+    title regexes; accurate_cuts re-encodes at the cut points instead of
+    cutting on the nearest keyframes.
+    'info_json' ({'path', 'expires'} from get_video_info) starts yt-dlp from
+    the explored metadata, skipping a second extraction while its stream
+    URLs are valid; otherwise, or if that run fails, the URL is extracted again.
+    The download goes out through a member of the egress pool (the one
+    that extracted info_json when it is still healthy).
+    Finished files are hashed and probed before publishing; truncated or
+    unreadable ones are downloaded again (config 'verify_retries').
+    On success the message lists the published file paths, each with its
+    sha256, duration and verification status.
+    Setting 'cancel_event' (a threading.Event) stops yt-dlp and fails the
+    download without publishing anything; partial files are kept.
     """
+    member = None
+    store = reservation = None
+    error_type = ERR_UNKNOWN
+    nbytes = 0
+    download_started = time.monotonic()
     try:
         ensure_yt_dlp(debug=debug)
+        config = load_config(debug=debug)
+        member = get_egress_pool().acquire(prefer=(info_json or {}).get('egress'))
+        output_dir = output_dir or config['output_dir']
+        template = template or config['filename_template']
+        job_dir = job_scratch_dir(scratch_dir or config['scratch_dir'], url, format_id, conv_mode,
+                                 tuple(sections or ()), bool(sections and accurate_cuts))
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         cookies_file = os.path.join(project_root, "cookies.txt")
         browser = get_default_browser()
-        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        
-        yt_cmd = os.path.join(project_root, "lib", "yt-dlp")
+
+        # Several formats ("137+251,140") are fetched by one run sharing a single extraction
+        multi_format = "," in format_id
+        if template.endswith(".%(ext)s"):
+            suffix = ""
+            if multi_format:
+                suffix += " [%(format_id)s]"
+            if sections:
+                # One file per section: keep them apart from each other and from the full video
+                suffix += " [%(section_start)s-%(section_end)s]"
+            template = template[:-len(".%(ext)s")] + suffix + ".%(ext)s"
         
         # Command setup
-        cmd = [
-            yt_cmd,
-            "--js-runtimes", "node",
+        cmd = yt_dlp_base_cmd() + [
             "-f", format_id,
-            "-o", "downloads/%(title)s.%(ext)s",
-            "--no-warnings",
-            "--user-agent", user_agent,
-            "--no-check-certificates"
-        ]
+            "-o", os.path.join(job_dir, template),
+            # Pick up .part files left by an interrupted run of the same job
+            "--continue",
+        ] + member.args
 
         if auth_args is not None:
             # Use the specific auth arguments that worked during Explore
@@ -338,53 +428,284 @@ def download_format(url, format_id, progress_callback=None, conv_mode=None, auth
             # Fallback if no specific auth_args passed (shouldn't happen with updated app.py)
             cmd.extend(["--cookies-from-browser", browser])
 
-        # Add conversion flags if requested
-        if conv_mode == "Convert to MP3":
-            cmd.extend(["--extract-audio", "--audio-format", "mp3"])
-        elif conv_mode == "Convert to WAV":
-            cmd.extend(["--extract-audio", "--audio-format", "wav"])
+        # Add conversion flags if requested (stream copy when the codec allows it)
+        cmd.extend(conversion_args(conv_mode, config))
+
+        if multi_format:
+            # Progress lines tagged with the format being downloaded
+            cmd.extend(["--newline", "--progress-template",
+                        "download:[download] %(info.format_id)s %(progress._percent_str)s"])
+
+        # Only the needed segments are fetched
+        for download_section in sections or []:
+            cmd.extend(["--download-sections", download_section])
+        if sections and accurate_cuts:
+            cmd.append("--force-keyframes-at-cuts")
+
+        # Start from the explored metadata while its stream URLs are still valid
+        info_path = usable_info(info_json)
+        if info_path and member.name != info_json.get('egress'):
+            # Signed for an egress that is out of the pool rotation now
+            info_path = None
+        url_cmd = cmd + [url]
+        if info_path:
+            cmd = cmd + ["--load-info-json", info_path]
+            if debug: print(f"Downloading from stored info JSON {info_path}")
+        else:
+            cmd = url_cmd
+
+        # Environment with PYTHONPATH for custom libs
+        env = yt_dlp_env()
+
+        def run_process():
+            # Start process
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1, env=env)
+            
+            error_output = []
             
-        cmd.append(url)
+            # Thread to read stderr
+            def read_stderr():
+                for err_line in process.stderr:
+                    if err_line.strip():
+                        error_output.append(err_line.strip())
+            
+            stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+            stderr_thread.start()
 
-        # Prepare environment with PYTHONPATH
-        env = os.environ.copy()
-        lib_path = os.path.join(project_root, "lib")
-        if os.path.exists(lib_path):
-            current_pythonpath = env.get("PYTHONPATH", "")
-            env["PYTHONPATH"] = f"{lib_path}{os.pathsep}{current_pythonpath}"
+            if cancel_event is not None:
+                def stop_on_cancel():
+                    while process.poll() is None:
+                        if cancel_event.wait(0.5):
+                            process.terminate()
+                            return
+                threading.Thread(target=stop_on_cancel, daemon=True).start()
 
-        # Start process
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1, env=env)
-        
-        error_output = []
-        
-        # Thread to read stderr
-        def read_stderr():
-            for err_line in process.stderr:
-                if err_line.strip():
-                    error_output.append(err_line.strip())
+            with section("download.output_loop"):
+                for line in process.stdout:
+                    # Look for lines like "[download]  25.0% of ..."
+                    if "[download]" in line and "%" in line:
+                        tagged = re.match(r'\[download\] (\S+)\s+(\d+\.?\d*%)', line) if multi_format else None
+                        match = re.search(r'(\d+\.?\d*%)', line)
+                        if tagged and progress_callback:
+                            progress_callback(f"{tagged.group(1)} {tagged.group(2)}")
+                        elif match and progress_callback:
+                            progress_callback(match.group(1))
+                    elif "[ExtractAudio]" in line or "[VideoRemuxer]" in line:
+                        if progress_callback:
+                            progress_callback("Converting...")
+                
+                process.wait()
+            stderr_thread.join(timeout=1.0)
+            return process.returncode, error_output
+
+        # A managed output folder makes room before the download instead of filling the disk midway
+        store = open_store(output_dir, config)
+        if store:
+            expected = None
+            # Sizes in the explored info stay valid after its stream URLs expired
+            explored_path = (info_json or {}).get('path')
+            if explored_path and os.path.exists(explored_path):
+                try:
+                    with open(explored_path) as fh:
+                        explored = json.load(fh)
+                    expected = estimate_size(normalize_formats(explored.get('formats'), explored.get('duration')),
+                                             format_id)
+                except (ValueError, OSError):
+                    expected = None
+            reservation = store.reserve(expected or 0)
+            if debug: print(f"Reserved {expected or 0} bytes in {output_dir}")
+
+        # Throttled attempts wait out the shared backoff and try again instead of failing
+        governor = get_governor(member.name)
+        def cancelled():
+            return cancel_event is not None and cancel_event.is_set()
+
+        for attempt in range(governor.retries + 1):
+            started = governor.acquire()
+            returncode, error_output = run_process()
+            throttled = returncode != 0 and classify_error("\n".join(error_output)) == ERR_RATE_LIMITED
+            governor.report(started, throttled)
+            if not throttled or attempt == governor.retries or cancelled():
+                break
+            if debug: print(f"Download rate limited, retrying in {governor.wait_time():.0f}s")
+            if progress_callback:
+                progress_callback(f"rate limited, retrying in {governor.wait_time():.0f}s")
+
+        if returncode != 0 and info_path and not cancelled():
+            # Stream URLs refused (expired early, IP change...): extract again, .part files are kept
+            if debug: print(f"Download from info JSON failed, re-extracting: {error_output[-1:]}")
+            cmd = url_cmd
+            started = governor.acquire()
+            returncode, error_output = run_process()
+            governor.report(started, returncode != 0 and classify_error("\n".join(error_output)) == ERR_RATE_LIMITED)
         
-        stderr_thread = threading.Thread(target=read_stderr, daemon=True)
-        stderr_thread.start()
-
-        for line in process.stdout:
-            # Look for lines like "[download]  25.0% of ..."
-            if "[download]" in line and "%" in line:
-                match = re.search(r'(\d+\.?\d*%)', line)
-                if match and progress_callback:
-                    progress_callback(match.group(1))
-            elif "[ExtractAudio]" in line:
+        # Clips are shorter than the video: only check that they are readable
+        expected_duration = None if sections else (info_json or {}).get('duration')
+        checks = []
+        # Publishing to another volume copies the files and hashes them on the way;
+        # only a same-volume rename needs a read of its own for the hash
+        hash_now = same_volume(job_dir, output_dir)
+        if returncode == 0:
+            checks = verify_files([os.path.join(job_dir, name) for name in finished_files(job_dir)], expected_duration,
+                                  hash_now)
+            for _retry in range(int(config['verify_retries'])):
+                bad = [c for c in checks if c['status'] in BAD_STATUSES]
+                if not bad:
+                    break
+                if debug: print(f"Integrity check failed, downloading again: {[(c['path'], c['error']) for c in bad]}")
                 if progress_callback:
-                    progress_callback("Converting...")
-        
-        process.wait()
-        stderr_thread.join(timeout=1.0)
-        
-        if process.returncode == 0:
-            return True, "Done"
+                    progress_callback("integrity check failed, downloading again")
+                if cancelled():
+                    break
+                for check in bad:
+                    os.remove(check['path'])
+                started = governor.acquire()
+                returncode, error_output = run_process()
+                governor.report(started, returncode != 0 and classify_error("\n".join(error_output)) == ERR_RATE_LIMITED)
+                if returncode != 0:
+                    break
+                checks = verify_files([os.path.join(job_dir, name) for name in finished_files(job_dir)],
+                                      expected_duration, hash_now)
+        bad = [c for c in checks if c['status'] in BAD_STATUSES] if returncode == 0 else []
+
+        if cancelled():
+            # Whoever cancelled (a worker that lost its lease) must not publish anything
+            error_type = None
+            return False, "Download cancelled"
+        if returncode == 0 and not bad:
+            # Partial files stay in the scratch folder on failure so a retry resumes them
+            error_type = None
+            nbytes = sum(c['size'] for c in checks)
+            copy_hashes = {}
+            published = publish_job(job_dir, output_dir, copy_hashes)
+            for path, check in zip(published, checks):
+                if check['sha256'] is None:
+                    # A subfolder on another mount than output_dir can still end up renamed
+                    check['sha256'] = copy_hashes.get(path) or hash_file(path)
+            if store:
+                # The files now count themselves; trim whatever the estimate missed
+                store.release(reservation)
+                reservation = None
+                store.add(published)
+                store.enforce()
+            if debug: print(f"Published: {published}")
+            # publish_job keeps the finished_files() order the checks were made in
+            lines = [f"{path} ({describe_check(check)})" for path, check in zip(published, checks)]
+            return True, "\n".join(lines) or "Done"
+        elif bad:
+            # Complete according to yt-dlp but broken: don't let a retry 'continue' from them
+            for check in bad:
+                if os.path.exists(check['path']):
+                    os.remove(check['path'])
+            details = "\n".join(f"{os.path.basename(c['path'])}: {c['status']} ({c['error']})" for c in bad)
+            return False, f"Integrity check failed\n{details}"
         else:
             err_summary = "\n".join(error_output)
-            return False, f"yt-dlp exited with code {process.returncode}\n{err_summary}"
+            error_type = classify_error(err_summary)
+            return False, f"yt-dlp exited with code {returncode}\n{err_summary}"
         
     except Exception as e:
         return False, str(e)
+    finally:
+        if store:
+            if reservation is not None:
+                store.release(reservation)
+            store.close()
+        if member is not None:
+            release_egress(member, error_type, nbytes, time.monotonic() - download_started)
+
+def stream_format(url, format_id, sink, progress_callback=None, auth_args=None, debug=False, info_json=None,
+                  chunk_size=256 * 1024):
+    """
+    Write a single format straight to 'sink' (a binary file object: stdout,
+    a named pipe, a socket file...) without touching the disk. Only formats
+    that need no merging or post-processing can be streamed (muxed or audio
+    only). Writes block while the consumer is slow, which stalls yt-dlp on
+    its pipe and so slows the download down to the consumer's pace.
+    progress_callback gets yt-dlp's percentage. Returns (success, message).
+    """
+    if "+" in format_id or "," in format_id:
+        return False, f"Cannot stream '{format_id}': only a single format that needs no merging can be streamed"
+    member = None
+    error_type = ERR_UNKNOWN
+    written = 0
+    stream_started = time.monotonic()
+    # Hashed on the way through, the consumer can check what it got
+    sink = HashingWriter(sink)
+    try:
+        ensure_yt_dlp(debug=debug)
+        member = get_egress_pool().acquire(prefer=(info_json or {}).get('egress'))
+        cmd = yt_dlp_base_cmd() + member.args + ["-f", format_id, "-o", "-", "--newline"]
+        if auth_args:
+            cmd.extend(auth_args)
+        info_path = usable_info(info_json)
+        if info_path and member.name != info_json.get('egress'):
+            info_path = None
+        url_cmd = cmd + [url]
+        cmd = cmd + ["--load-info-json", info_path] if info_path else url_cmd
+
+        def run_process(cmd):
+            nonlocal written
+            # With -o - yt-dlp sends its messages and progress to stderr
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=yt_dlp_env())
+            error_output = []
+
+            def read_stderr():
+                for raw in process.stderr:
+                    line = raw.decode(errors="replace").strip()
+                    match = re.search(r'\[download\]\s+(\d+\.?\d*%)', line)
+                    if match:
+                        if progress_callback: progress_callback(match.group(1))
+                    elif line:
+                        error_output.append(line)
+
+            stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+            stderr_thread.start()
+            try:
+                with section("stream.copy_loop"):
+                    while True:
+                        chunk = process.stdout.read1(chunk_size)
+                        if not chunk:
+                            break
+                        sink.write(chunk)
+                        written += len(chunk)
+                    sink.flush()
+            except (BrokenPipeError, ConnectionError):
+                # Consumer went away: no point in downloading the rest
+                process.kill()
+                error_output.append(f"Consumer closed the stream after {written} bytes")
+            process.wait()
+            stderr_thread.join(timeout=1.0)
+            return process.returncode, error_output
+
+        # Nothing reached the consumer yet: a throttled or refused start can still be retried
+        governor = get_governor(member.name)
+        for attempt in range(governor.retries + 1):
+            started = governor.acquire()
+            returncode, error_output = run_process(cmd)
+            throttled = returncode != 0 and classify_error("\n".join(error_output)) == ERR_RATE_LIMITED
+            governor.report(started, throttled)
+            if not throttled or written or attempt == governor.retries:
+                break
+            if progress_callback:
+                progress_callback(f"rate limited, retrying in {governor.wait_time():.0f}s")
+
+        if returncode != 0 and written == 0 and info_path:
+            # Stream URLs refused (expired early, IP change...): extract again
+            if debug: print(f"Streaming from info JSON failed, re-extracting: {error_output[-1:]}")
+            started = governor.acquire()
+            returncode, error_output = run_process(url_cmd)
+            governor.report(started, returncode != 0 and classify_error("\n".join(error_output)) == ERR_RATE_LIMITED)
+
+        if returncode == 0:
+            error_type = None
+            return True, f"Streamed {written} bytes (sha256 {sink.hexdigest()})"
+        err_summary = "\n".join(error_output)
+        error_type = classify_error(err_summary)
+        return False, f"yt-dlp exited with code {returncode} after {written} bytes\n{err_summary}"
+
+    except Exception as e:
+        return False, str(e)
+    finally:
+        if member is not None:
+            release_egress(member, error_type, written, time.monotonic() - stream_started)
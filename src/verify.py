@@ -0,0 +1,137 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Integrity checks of finished files: content hash plus a container/duration probe
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+STATUS_OK = "ok"
+STATUS_TRUNCATED = "truncated"
+STATUS_CORRUPT = "corrupt"
+# No ffprobe available: hashed but not probed
+STATUS_UNVERIFIED = "unverified"
+
+BAD_STATUSES = (STATUS_TRUNCATED, STATUS_CORRUPT)
+
+# Shorter than the expected duration by more than this is a truncated file
+DURATION_TOLERANCE = 0.02
+MIN_DURATION_SLACK = 2.0
+
+_pool = None
+_pool_lock = threading.Lock()
+
+class HashingWriter:
+    """Binary file object wrapper hashing everything written through it."""
+    def __init__(self, sink, algorithm="sha256"):
+        self.sink = sink
+        self.hash = hashlib.new(algorithm)
+        self.size = 0
+
+    def write(self, data):
+        self.hash.update(data)
+        self.size += len(data)
+        return self.sink.write(data)
+
+    def flush(self):
+        self.sink.flush()
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """sha256 of a file, for files published by a rename (no copy to hash on the way)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def probe_media(path, timeout=60):
+    """
+    Container and duration from ffprobe (reads headers and index only).
+    Returns {'format', 'duration'}, None without ffprobe, or {'error': ...}.
+    """
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    try:
+        res = subprocess.run([ffprobe, "-v", "error", "-show_entries", "format=format_name,duration",
+                              "-of", "json", path], capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': "ffprobe timed out"}
+    if res.returncode != 0:
+        return {'error': res.stderr.strip()[-300:] or f"ffprobe exited with code {res.returncode}"}
+    try:
+        fmt = json.loads(res.stdout).get('format') or {}
+        duration = float(fmt['duration']) if fmt.get('duration') not in (None, "N/A") else None
+    except (ValueError, TypeError):
+        return {'error': "Unreadable ffprobe output"}
+    return {'format': fmt.get('format_name'), 'duration': duration}
+
+def verify_file(path, expected_duration=None, hash_content=True):
+    """
+    Hash and probe one file. Returns a dict with path, sha256, size, format,
+    duration and status. With hash_content=False sha256 is None: the caller
+    hashes the file while copying it anyway.
+    """
+    result = {'path': path, 'sha256': hash_file(path) if hash_content else None, 'size': os.path.getsize(path),
+              'format': None, 'duration': None, 'status': STATUS_UNVERIFIED, 'error': None}
+    probe = probe_media(path)
+    if probe is None:
+        return result
+    if 'error' in probe:
+        result.update(status=STATUS_CORRUPT, error=probe['error'])
+        return result
+    result.update(format=probe['format'], duration=probe['duration'], status=STATUS_OK)
+    if expected_duration:
+        slack = max(MIN_DURATION_SLACK, expected_duration * DURATION_TOLERANCE)
+        if probe['duration'] is None or probe['duration'] < expected_duration - slack:
+            result.update(status=STATUS_TRUNCATED,
+                          error=f"duration {probe['duration']}s, expected {expected_duration}s")
+    return result
+
+def get_verify_pool():
+    """Pool shared by all downloads of the process, bounding concurrent hashing and probing."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from .config import load_config
+            _pool = ThreadPoolExecutor(max_workers=max(1, int(load_config()['verify_workers'])),
+                                       thread_name_prefix="verify")
+        return _pool
+
+def verify_files(paths, expected_duration=None, hash_content=True):
+    """Verify files in the shared pool and wait for all of them. Results in the order of 'paths'."""
+    pool = get_verify_pool()
+    futures = [pool.submit(verify_file, path, expected_duration, hash_content) for path in paths]
+    return [f.result() for f in futures]
+
+def describe_check(check):
+    """Short summary appended to a published path."""
+    parts = [f"sha256 {check['sha256']}"]
+    if check['duration'] is not None:
+        parts.append(f"{check['duration']:.1f}s")
+    parts.append(check['status'])
+    return ", ".join(parts)
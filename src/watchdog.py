@@ -0,0 +1,154 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Tk main thread stall watchdog: event loop lag histogram and stacks of freezes
+
+import atexit
+import os
+import sys
+import threading
+import time
+import traceback
+
+# Upper bounds (ms) of the lag histogram buckets; the last one is open ended
+LAG_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+class UIWatchdog:
+    """
+    A Tk 'after' heartbeat measures how late the event loop runs it (the
+    lag every user action would see). A side thread notices when the
+    heartbeat stops for longer than stall_threshold and samples the main
+    thread's Python stack every stall_threshold until it comes back, so a
+    freeze report says where the time went. A report is written at exit.
+    """
+    def __init__(self, root, report_dir, interval=0.05, stall_threshold=0.25, debug=False):
+        self.root = root
+        self.report_dir = report_dir
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.debug = debug
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.main_ident = threading.get_ident()
+        self.histogram = [0] * (len(LAG_BUCKETS) + 1)
+        self.beats = 0
+        self.max_lag = 0.0
+        self.stalls = []
+        self.current_stall = None
+        self.expected = None
+        self.last_beat = None
+        self.started = None
+
+    def start(self):
+        """Call from the Tk thread, before mainloop()."""
+        self.main_ident = threading.get_ident()
+        self.started = time.perf_counter()
+        self.last_beat = self.started
+        self._schedule()
+        threading.Thread(target=self._monitor, daemon=True).start()
+        atexit.register(self.write_report)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _schedule(self):
+        self.expected = time.perf_counter() + self.interval
+        self.root.after(int(self.interval * 1000), self._beat)
+
+    def _beat(self):
+        now = time.perf_counter()
+        lag = max(0.0, now - self.expected)
+        bucket = next((i for i, bound in enumerate(LAG_BUCKETS) if lag * 1000 <= bound), len(LAG_BUCKETS))
+        with self.lock:
+            self.histogram[bucket] += 1
+            self.beats += 1
+            self.max_lag = max(self.max_lag, lag)
+            self.last_beat = now
+            if self.current_stall is not None:
+                stall, self.current_stall = self.current_stall, None
+                stall['duration'] = now - stall['since']
+                self.stalls.append(stall)
+                if self.debug: print(f"UI thread was blocked for {stall['duration'] * 1000:.0f} ms", file=sys.stderr)
+        if not self.stop_event.is_set():
+            self._schedule()
+
+    def _monitor(self):
+        while not self.stop_event.wait(self.stall_threshold / 2):
+            now = time.perf_counter()
+            with self.lock:
+                # The beat is only due at 'expected'; lateness beyond that is the block
+                blocked = now - max(self.last_beat, self.expected or now)
+                if blocked < self.stall_threshold:
+                    continue
+                stall = self.current_stall
+                if stall is None:
+                    stall = self.current_stall = {'since': now - blocked, 'samples': {}, 'next_sample': now}
+                elif now < stall['next_sample']:
+                    continue
+                stall['next_sample'] = now + self.stall_threshold
+            frame = sys._current_frames().get(self.main_ident)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            with self.lock:
+                stall['samples'][stack] = stall['samples'].get(stack, 0) + 1
+
+    def write_report(self):
+        """Write the lag histogram and the stalls with their sampled stacks. Returns the report path."""
+        if self.started is None:
+            return None
+        self.stop()
+        with self.lock:
+            histogram = list(self.histogram)
+            beats = self.beats
+            stalls = sorted(self.stalls, key=lambda s: -s['duration'])
+            max_lag = self.max_lag
+        lines = [f"Yutub UI watchdog - pid {os.getpid()} - {time.strftime('%Y-%m-%d %H:%M:%S')}",
+                 f"Run time: {time.perf_counter() - self.started:.1f}s, heartbeats: {beats}, max lag: {max_lag * 1000:.0f} ms",
+                 "", "Event loop lag (ms)"]
+        lower = 0
+        for bound, count in zip(list(LAG_BUCKETS) + [None], histogram):
+            label = f"{lower}-{bound}" if bound is not None else f">{lower}"
+            share = 100.0 * count / beats if beats else 0.0
+            lines.append(f"  {label:>10} {count:>8} {share:6.1f}% {'#' * int(share / 2)}")
+            lower = bound
+        lines.append("")
+        lines.append(f"Stalls over {self.stall_threshold * 1000:.0f} ms: {len(stalls)}"
+                     f" ({sum(s['duration'] for s in stalls):.2f}s in total)")
+        for stall in stalls[:20]:
+            lines.append(f"\n--- blocked {stall['duration'] * 1000:.0f} ms ---")
+            for stack, count in sorted(stall['samples'].items(), key=lambda kv: -kv[1]):
+                lines.append(f"[{count} sample(s)]")
+                lines.append(stack.rstrip())
+
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = os.path.join(self.report_dir, "ui-watchdog.txt")
+        with open(path, "w") as fh:
+            fh.write("\n".join(lines) + "\n")
+        print(f"UI watchdog report written to {path}", file=sys.stderr)
+        return path
+
+def start_watchdog(root, report_dir=None, debug=False, **kwargs):
+    """Attach a watchdog to a Tk root. Reports go to data/profiles/<time>-<pid> by default."""
+    if report_dir is None:
+        from .utils import get_data_dir
+        report_dir = os.path.join(get_data_dir(), "profiles", f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    watchdog = UIWatchdog(root, report_dir, debug=debug, **kwargs)
+    watchdog.start()
+    return watchdog
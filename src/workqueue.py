@@ -0,0 +1,229 @@
+# Yutub - YouTube Downloader
+# Copyright (C) 2025 Octavio Rossell Tabet <octavio.rossell@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Developed by Octavio Rossell Tabet octavio.rossell@gmail.com
+# https://github.com/octaviotron/yutub
+
+# Shared job queue (SQLite file) and the worker loop that drains it
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# Seconds between heartbeat attempts after a failed one
+HEARTBEAT_RETRY = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    prefs TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    worker TEXT,
+    lease_expires REAL,
+    progress TEXT,
+    result TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (url, prefs)
+)
+"""
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class JobQueue:
+    """
+    Jobs in a SQLite file that several processes (or hosts, via shared
+    storage) use at once. A claimed job is leased to one worker; the lease
+    is extended by heartbeats and the job is handed to another worker when
+    it expires. Each connection is used by a single thread.
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Rollback journal (not WAL): WAL needs shared memory, unavailable on network filesystems
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _write(self, sql, params=()):
+        """Run a statement in its own write transaction and return the cursor."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = self.conn.execute(sql, params)
+            self.conn.execute("COMMIT")
+            return cur
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, url, prefs, max_attempts=3):
+        """Add a job. The same URL with the same preferences is only queued once."""
+        now = time.time()
+        cur = self._write(
+            "INSERT OR IGNORE INTO jobs (url, prefs, max_attempts, created, updated) VALUES (?, ?, ?, ?, ?)",
+            (url, json.dumps(prefs, sort_keys=True), max_attempts, now, now))
+        return cur.lastrowid if cur.rowcount else None
+
+    def claim(self, worker, lease_seconds):
+        """Lease the oldest queued (or lease-expired) job to 'worker'. Returns a dict or None."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases whose attempts are used up will not be retried
+            self.conn.execute(
+                "UPDATE jobs SET status=?, result=?, updated=? WHERE status=? AND lease_expires<? AND attempts>=max_attempts",
+                (STATUS_FAILED, "Lease expired on the last attempt", now, STATUS_RUNNING, now))
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status=? OR (status=? AND lease_expires<?) ORDER BY id LIMIT 1",
+                (STATUS_QUEUED, STATUS_RUNNING, now)).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status=?, worker=?, lease_expires=?, attempts=attempts+1, progress=NULL, updated=? WHERE id=?",
+                (STATUS_RUNNING, worker, now + lease_seconds, now, row['id']))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        job = dict(row)
+        job['prefs'] = json.loads(job['prefs'])
+        job['attempts'] += 1
+        return job
+
+    def heartbeat(self, job_id, worker, lease_seconds, progress=None):
+        """Extend the lease. Returns False if the job is no longer owned by 'worker'."""
+        now = time.time()
+        cur = self._write(
+            "UPDATE jobs SET lease_expires=?, progress=COALESCE(?, progress), updated=? WHERE id=? AND worker=? AND status=?",
+            (now + lease_seconds, progress, now, job_id, worker, STATUS_RUNNING))
+        return cur.rowcount == 1
+
+    def complete(self, job_id, worker, success, result):
+        """
+        Record a job result. Failed jobs go back to the queue until
+        max_attempts is reached. Returns False if the lease had been lost.
+        """
+        now = time.time()
+        cur = self._write(
+            "UPDATE jobs SET status=CASE WHEN ? THEN ? WHEN attempts>=max_attempts THEN ? ELSE ? END, "
+            "result=?, lease_expires=NULL, updated=? WHERE id=? AND worker=? AND status=?",
+            (1 if success else 0, STATUS_DONE, STATUS_FAILED, STATUS_QUEUED, result, now, job_id, worker, STATUS_RUNNING))
+        return cur.rowcount == 1
+
+    def requeue_failed(self):
+        """Give failed jobs a fresh set of attempts."""
+        cur = self._write("UPDATE jobs SET status=?, attempts=0, updated=? WHERE status=?",
+                          (STATUS_QUEUED, time.time(), STATUS_FAILED))
+        return cur.rowcount
+
+    def jobs(self, status=None):
+        if status:
+            rows = self.conn.execute("SELECT * FROM jobs WHERE status=? ORDER BY id", (status,))
+        else:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY id")
+        return [dict(r) for r in rows]
+
+    def counts(self):
+        return {r['status']: r['n'] for r in self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+
+def run_worker(db_path, run=None, lease_seconds=300, poll_interval=5.0, once=False, stop_event=None, debug=False, **download_kwargs):
+    """
+    Claim and run jobs until stopped (or, with once=True, until the queue is empty).
+    'run' is called as run(url, prefs, progress_callback, debug=..., cancel_event=..., **download_kwargs)
+    and returns (success, message); it defaults to jobs.run_job. cancel_event is
+    set when the lease is lost, so the job stops instead of running twice.
+    """
+    if run is None:
+        from .jobs import run_job as run
+    stop_event = stop_event or threading.Event()
+    me = worker_id()
+    queue = JobQueue(db_path)
+    processed = 0
+    try:
+        while not stop_event.is_set():
+            job = queue.claim(me, lease_seconds)
+            if job is None:
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+
+            if debug: print(f"[{me}] claimed job {job['id']} (attempt {job['attempts']}): {job['url']}")
+            latest = {'progress': None}
+            done = threading.Event()
+            lost = threading.Event()
+
+            def beat(job_id=job['id']):
+                # Separate connection: sqlite3 connections stay on their own thread
+                hb_queue = None
+                renewed = time.monotonic()
+                wait = lease_seconds / 3
+                try:
+                    while not done.wait(wait):
+                        wait = lease_seconds / 3
+                        try:
+                            if hb_queue is None:
+                                hb_queue = JobQueue(db_path)
+                            owned = hb_queue.heartbeat(job_id, me, lease_seconds, latest['progress'])
+                        except sqlite3.OperationalError as e:
+                            # Database busy or shared storage briefly unreachable: retry sooner,
+                            # as long as the lease can still be renewed before it expires
+                            wait = min(wait, HEARTBEAT_RETRY)
+                            if time.monotonic() - renewed + wait < lease_seconds:
+                                if debug: print(f"[{me}] heartbeat of job {job_id} failed, retrying: {e}")
+                                continue
+                            owned = False
+                        if not owned:
+                            if debug: print(f"[{me}] lost lease on job {job_id}, stopping it")
+                            lost.set()
+                            break
+                        renewed = time.monotonic()
+                finally:
+                    if hb_queue is not None:
+                        hb_queue.close()
+
+            hb_thread = threading.Thread(target=beat, daemon=True)
+            hb_thread.start()
+            try:
+                success, msg = run(job['url'], job['prefs'], lambda p: latest.update(progress=p), debug=debug,
+                                   cancel_event=lost, **download_kwargs)
+            except Exception as e:
+                success, msg = False, str(e)
+            done.set()
+            hb_thread.join()
+
+            if not queue.complete(job['id'], me, success, msg):
+                if debug: print(f"[{me}] result of job {job['id']} discarded: lease was taken over")
+            processed += 1
+    finally:
+        queue.close()
+    return processed
@@ -26,10 +26,28 @@ lib_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib")
 if os.path.exists(lib_path):
     sys.path.insert(0, lib_path)
 
-from src.app import YutubApp
-
 if __name__ == "__main__":
+    # Any command line arguments run Yutub headless (see: yutub.py --help)
+    if len(sys.argv) > 1:
+        if os.environ.get("YUTUB_PROFILE") and "--profile" not in sys.argv:
+            sys.argv.insert(1, "--profile")
+        from src.cli import main
+        sys.exit(main())
+
+    from src.app import YutubApp
+
     # Set to True to enable STDOUT and STDERR messages for debugging
     DEBUG = False
+    # Set to True (or export YUTUB_PROFILE=1) to write a profiling report to data/profiles at exit
+    PROFILE = False
+    if PROFILE or os.environ.get("YUTUB_PROFILE"):
+        from src import profiling
+        profiling.enable()
+    # Set to True (or export YUTUB_WATCHDOG=1) to report UI thread freezes and event loop lag at exit
+    WATCHDOG = False
+
     app = YutubApp(debug=DEBUG)
+    if WATCHDOG or os.environ.get("YUTUB_WATCHDOG"):
+        from src.watchdog import start_watchdog
+        start_watchdog(app, debug=DEBUG)
     app.mainloop()